@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for LG MEN3 Activator: hashing, manifest JSON and full build/verify
+Prints a JSON report (see python benchmark.py --help)
+"""
+
+from men3_activator.bench import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+LG MEN3 Activator build tools
+
+Shared engine behind auto_build.py, calculate_checksums.py and
+verify_checksums.py. Submodules are imported on first attribute access,
+so `import men3_activator` is cheap and a hashing-only caller never loads
+the CLI, colorama or SQLite.
+
+    from men3_activator import verify_tree
+    ok, results = verify_tree("/path/to/package")
+"""
+
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "ActivatorBuilder": "builder",
+    "BackupStore": "backup",
+    "ChecksumRef": "manifest",
+    "DigestCache": "cache",
+    "FileReader": "hashing",
+    "HashBackend": "backends",
+    "JSON_DELETE": "patcher",
+    "ManifestGraph": "manifest",
+    "ManifestNode": "manifest",
+    "ManifestTransaction": "writer",
+    "SchemaError": "manifest",
+    "calculate_block_checksums": "hashing",
+    "calculate_block_checksums_cached": "hashing",
+    "calculate_buffer_checksums": "hashing",
+    "calculate_sha256": "hashing",
+    "content_digest": "hashing",
+    "get_backend": "backends",
+    "main": "cli",
+    "patch_json_entries": "patcher",
+    "register_backend": "backends",
+    "update_tree": "api",
+    "verify_tree": "api",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
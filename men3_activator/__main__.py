@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""python -m men3_activator: same as auto_build.py"""
+
+from .cli import main
+
+main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio hashing pipeline for slow or removable media (SD cards, USB sticks)
+
+One reader thread streams CheckSumSize blocks sequentially, keeping up to
+`prefetch` blocks in flight, while the hash pool digests blocks that have
+already arrived. Reads stay sequential (what flash media are fastest at)
+and memory is capped at `prefetch` blocks per file.
+"""
+
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from .backends import sha256
+from .constants import ASYNC_PREFETCH, CHECKSUM_SIZE
+from .hashing import get_hash_pool
+
+if TYPE_CHECKING:
+    from .cache import DigestCache
+    from .metrics import IOStats
+
+
+def _sha256_digest(data: bytes) -> bytes:
+    return sha256(data).digest()
+
+
+async def calculate_block_checksums_async(file_path: Path, block_size: int = CHECKSUM_SIZE,
+                                          prefetch: int = ASYNC_PREFETCH,
+                                          hash_workers: Optional[int] = None,
+                                          io_executor: Optional[ThreadPoolExecutor] = None) -> List[bytes]:
+    """CheckSum list of file, overlapping sequential reads with hashing"""
+    if block_size <= 0:
+        raise ValueError(f"Invalid CheckSumSize: {block_size}")
+
+    loop = asyncio.get_running_loop()
+    hash_pool = get_hash_pool(hash_workers)
+    own_executor = io_executor is None
+    if own_executor:
+        io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aio-read")
+
+    # Blocks read but not yet hashed; the reader waits when it is full
+    in_flight = asyncio.Semaphore(max(1, prefetch))
+    blocks: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=max(1, prefetch))
+
+    f = await loop.run_in_executor(io_executor, open, file_path, 'rb')
+    try:
+        async def reader():
+            try:
+                first = True
+                while True:
+                    await in_flight.acquire()
+                    data = await loop.run_in_executor(io_executor, f.read, block_size)
+                    # An empty file still has one (empty) block
+                    if not data and not first:
+                        in_flight.release()
+                        break
+                    first = False
+                    await blocks.put(data)
+                    if len(data) < block_size:
+                        break
+            finally:
+                await blocks.put(None)
+
+        read_task = asyncio.ensure_future(reader())
+        digests: List["asyncio.Future[bytes]"] = []
+        while True:
+            data = await blocks.get()
+            if data is None:
+                break
+            digest = loop.run_in_executor(hash_pool, _sha256_digest, data)
+            digest.add_done_callback(lambda _: in_flight.release())
+            digests.append(digest)
+        await read_task
+        return list(await asyncio.gather(*digests))
+    finally:
+        await loop.run_in_executor(io_executor, f.close)
+        if own_executor:
+            io_executor.shutdown(wait=False)
+
+
+async def measure_files_async(files: Sequence[Tuple[Path, int]], prefetch: int = ASYNC_PREFETCH,
+                              concurrency: int = 1, hash_workers: Optional[int] = None,
+                              cache: Optional["DigestCache"] = None,
+                              stats: Optional["IOStats"] = None
+                              ) -> List[Tuple[Optional[int], List[bytes], Optional[Exception]]]:
+    """(size, CheckSum list, error) for each (path, CheckSumSize), in input order
+
+    `concurrency` files are streamed at once (default 1: one sequential
+    stream, best for a single card). Cached digests are used when the file
+    is unchanged; reads and cache hits are counted in `stats` if given.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def measure(file_path: Path, block_size: int):
+        async with limit:
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                return None, [], None
+            try:
+                checksums = cache.get(file_path, block_size, st) if cache is not None else None
+                if checksums is None:
+                    start = time.perf_counter()
+                    checksums = await calculate_block_checksums_async(
+                        file_path, block_size, prefetch, hash_workers)
+                    if stats is not None:
+                        stats.record_read(file_path, st.st_size, time.perf_counter() - start)
+                    if cache is not None:
+                        cache.put(file_path, block_size, st, checksums)
+                        if stats is not None:
+                            stats.add(cache_misses=1)
+                elif stats is not None:
+                    stats.add(file_path, cache_hits=1)
+                return st.st_size, checksums, None
+            except Exception as e:
+                return st.st_size, [], e
+
+    return list(await asyncio.gather(*(measure(path, size) for path, size in files)))
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+In-process entry points for automation
+
+Each call runs a silent ActivatorBuilder (no console output, no
+interpreter start-up) and returns plain results.
+"""
+
+from pathlib import Path
+from typing import Dict, Tuple
+
+from .builder import ActivatorBuilder
+
+
+def update_tree(base_dir: Path, **options) -> bool:
+    """Update all checksums of the package tree at base_dir"""
+    options.setdefault("log_format", "none")
+    with ActivatorBuilder(base_dir=Path(base_dir), **options) as builder:
+        return builder.update_checksums()
+
+
+def verify_tree(base_dir: Path, **options) -> Tuple[bool, Dict[str, str]]:
+    """Verify all checksums of the package tree at base_dir"""
+    options.setdefault("log_format", "none")
+    with ActivatorBuilder(base_dir=Path(base_dir), **options) as builder:
+        return builder.verify_checksums()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+SHA-256 backend registry
+
+Candidates, in order of preference: backends registered with
+register_backend(), an installed native extension (an importable module
+named in NATIVE_MODULES with a hashlib-style sha256 constructor),
+hashlib's OpenSSL implementation (uses SHA-NI / ARMv8 SHA2 instructions
+where the CPU has them) and CPython's builtin _sha256/_sha2 module. On
+first use the first candidate that passes a known-answer self-test is
+used for all checksums; MEN3_HASH_BACKEND=<name> forces one. Throughput
+of every candidate is compared by the benchmark suite, not at start-up.
+"""
+
+import os
+import hashlib
+import threading
+import importlib
+import importlib.util
+from typing import Any, Callable, Dict, List, Optional
+
+HASH_BACKEND_ENV = "MEN3_HASH_BACKEND"
+# Optional native extensions, registered under their module name when importable
+NATIVE_MODULES = ("men3_sha256",)
+
+_NIST_MESSAGE = b"abcdbcdecdefdefgefghfghighijhijkijkljklmklmnlmnomnopnopq"
+_KNOWN_ANSWERS = {
+    b"": "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855",
+    b"abc": "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad",
+    _NIST_MESSAGE: "248d6a61d20638b8e5c026930c3e6039a33ce45964ff2167f6ecedd419db06c1",
+}
+
+# name -> constructor returning a hashlib-compatible sha256 object
+_factories: Dict[str, Callable[..., Any]] = {}
+_builtins_registered = False
+_selected: Optional["HashBackend"] = None
+_lock = threading.Lock()
+
+
+class HashBackend:
+    """A SHA-256 implementation: new() returns a hasher (update/digest/hexdigest)"""
+
+    def __init__(self, name: str, new: Callable[..., Any]):
+        self.name = name
+        self.new = new
+
+    def __repr__(self) -> str:
+        return f"HashBackend({self.name!r})"
+
+
+def register_backend(name: str, factory: Callable[..., Any]):
+    """Add a candidate (e.g. a native extension's sha256 constructor)
+
+    Registering after the first checksum has no effect until reset_backend().
+    """
+    _factories[name] = factory
+
+
+def _register_builtin():
+    global _builtins_registered
+    _builtins_registered = True
+    for module_name in NATIVE_MODULES:
+        # find_spec first: a missing extension costs no import attempt
+        if importlib.util.find_spec(module_name) is None:
+            continue
+        try:
+            register_backend(module_name, importlib.import_module(module_name).sha256)
+        except (ImportError, AttributeError):
+            continue
+    try:
+        import _hashlib
+        register_backend("openssl", _hashlib.openssl_sha256)
+    except (ImportError, AttributeError):
+        # Whatever hashlib falls back to
+        register_backend("hashlib", hashlib.sha256)
+    for module_name in ("_sha2", "_sha256"):  # _sha2 since Python 3.12
+        try:
+            module = __import__(module_name)
+            register_backend("builtin", module.sha256)
+            break
+        except (ImportError, AttributeError):
+            continue
+
+
+def self_test(factory: Callable[..., Any]) -> bool:
+    """True if the backend passes the known-answer tests"""
+    try:
+        for data, digest in _KNOWN_ANSWERS.items():
+            if factory(data).hexdigest() != digest:
+                return False
+        # Incremental updates over memoryview slices, as the block hasher uses them
+        hasher = factory()
+        view = memoryview(_NIST_MESSAGE)
+        for offset in range(0, len(view), 5):
+            hasher.update(view[offset:offset + 5])
+        return hasher.digest() == bytes.fromhex(_KNOWN_ANSWERS[_NIST_MESSAGE])
+    except Exception:
+        return False
+
+
+def _preference_order() -> List[str]:
+    """Registered extensions first, then openssl/hashlib, then builtin"""
+    if not _builtins_registered:
+        _register_builtin()
+    fallbacks = ("openssl", "hashlib", "builtin")
+    return ([name for name in _factories if name not in fallbacks]
+            + [name for name in fallbacks if name in _factories])
+
+
+def candidates() -> List[HashBackend]:
+    """Every backend that passes the self-test, in order of preference"""
+    return [HashBackend(name, _factories[name]) for name in _preference_order()
+            if self_test(_factories[name])]
+
+
+def select_backend(forced: Optional[str] = None) -> HashBackend:
+    """First candidate that passes the self-test (or the forced one)"""
+    for name in _preference_order():
+        if forced and name != forced:
+            continue
+        if self_test(_factories[name]):
+            return HashBackend(name, _factories[name])
+    if forced:
+        raise ValueError(f"Hash backend {forced!r} is not available or failed its self-test")
+    return HashBackend("hashlib", hashlib.sha256)
+
+
+def get_backend() -> HashBackend:
+    """Backend used for all checksums, selected on first call"""
+    global _selected
+    if _selected is None:
+        with _lock:
+            if _selected is None:
+                _selected = select_backend(os.environ.get(HASH_BACKEND_ENV) or None)
+    return _selected
+
+
+def reset_backend():
+    """Select again on next use (after register_backend())"""
+    global _selected
+    with _lock:
+        _selected = None
+
+
+def sha256(data: bytes = b"") -> Any:
+    """New SHA-256 hasher from the selected backend"""
+    hasher = get_backend().new()
+    if data:
+        hasher.update(data)
+    return hasher
+
+
+def cpu_sha_extensions() -> Optional[bool]:
+    """True if the CPU advertises SHA instructions (x86 SHA-NI, ARMv8 sha2)"""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    flags = line.split(":", 1)[1].split()
+                    return "sha_ni" in flags or "sha2" in flags
+    except OSError:
+        pass
+    return None
+
+
+def describe() -> Dict[str, Any]:
+    """Selected backend and platform details (for benchmarks and reports)"""
+    backend = get_backend()
+    info: Dict[str, Any] = {
+        "name": backend.name,
+        "candidates": _preference_order(),
+        "cpu_sha_extensions": cpu_sha_extensions(),
+    }
+    if backend.name == "openssl":
+        import ssl
+        info["openssl"] = ssl.OPENSSL_VERSION
+    return info
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed backup store for manifests
+"""
+
+import os
+import sys
+import json
+import shutil
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .constants import BACKUP_INDEX_NAME, CHECKSUM_SIZE
+from .cache import DigestCache
+from .hashing import calculate_block_checksums_cached, content_digest
+
+FICLONE = 0x40049409  # Linux ioctl: share extents with another file (reflink)
+
+def clone_or_copy(src: Path, dst: Path):
+    """Copy src to dst without duplicating data where possible
+
+    Tries a reflink (copy-on-write clone), then a plain copy. Never a
+    hardlink: the scripts and editors rewrite manifests in place, which
+    would silently change the backup under its digest.
+    """
+    if sys.platform.startswith("linux"):
+        import fcntl
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+class BackupStore:
+    """Content-addressed, deduplicated backup store
+
+    Each backed-up version is stored once under objects/<aa>/<digest>;
+    index.jsonl records (original path, timestamp, digest) for every
+    backup. Backing up unchanged content only appends to the index.
+    """
+
+    def __init__(self, backup_dir: Path, base_dir: Path, cache: Optional[DigestCache] = None):
+        self.backup_dir = backup_dir
+        self.base_dir = base_dir
+        self.objects_dir = backup_dir / "objects"
+        self.index_path = backup_dir / BACKUP_INDEX_NAME
+        self.cache = cache
+        self._entries: Optional[List[Dict[str, str]]] = None
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _relative(self, file_path: Path) -> str:
+        try:
+            return file_path.resolve().relative_to(self.base_dir.resolve()).as_posix()
+        except ValueError:
+            return str(file_path.resolve())
+
+    @property
+    def entries(self) -> List[Dict[str, str]]:
+        if self._entries is None:
+            self._entries = []
+            if self.index_path.exists():
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._entries = [json.loads(line) for line in f if line.strip()]
+        return self._entries
+
+    def store(self, file_path: Path) -> Tuple[Dict[str, str], bool]:
+        """Back up file, return its index entry and whether new content was written"""
+        digest = content_digest(calculate_block_checksums_cached(
+            file_path, CHECKSUM_SIZE, cache=self.cache))
+        obj = self.object_path(digest)
+        created = False
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp = obj.with_name(f".{digest}.tmp")
+            clone_or_copy(file_path, tmp)
+            os.replace(tmp, obj)
+            created = True
+
+        entry = {
+            "path": self._relative(file_path),
+            "time": datetime.now().strftime("%Y%m%d_%H%M%S"),
+            "digest": digest,
+        }
+        self.entries.append(entry)
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry, created
+
+    def gc(self, keep: Optional[int] = None) -> Tuple[int, int]:
+        """Keep the newest `keep` backups per file and delete unreferenced objects
+
+        Returns (index entries dropped, objects deleted).
+        """
+        entries = self.entries
+        if keep is not None:
+            kept: List[Dict[str, str]] = []
+            seen: Dict[str, int] = {}
+            for entry in reversed(entries):
+                seen[entry["path"]] = seen.get(entry["path"], 0) + 1
+                if seen[entry["path"]] <= keep:
+                    kept.append(entry)
+            kept.reverse()
+        else:
+            kept = list(entries)
+        dropped = len(entries) - len(kept)
+
+        if dropped:
+            tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for entry in kept:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.index_path)
+            self._entries = kept
+
+        referenced = {entry["digest"] for entry in kept}
+        deleted = 0
+        if self.objects_dir.exists():
+            for obj in self.objects_dir.glob("*/*"):
+                if obj.name not in referenced:
+                    obj.unlink()
+                    deleted += 1
+        return dropped, deleted
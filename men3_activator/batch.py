@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Batch and daemon verification of many package trees from one process
+
+All trees share one digest cache and one verification pool, so repeated
+CI checks of the same (or overlapping) trees pay neither interpreter
+start-up nor cold hashing.
+"""
+
+import os
+import sys
+import json
+import stat
+import errno
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+from .builder import ActivatorBuilder
+from .cache import DigestCache
+from .constants import CACHE_FILE_NAME
+
+
+def default_cache_path() -> Path:
+    """Shared digest cache location for batch runs ($XDG_CACHE_HOME/men3_activator)"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "men3_activator" / CACHE_FILE_NAME
+
+
+def read_roots(roots: Iterable[str], stdin: TextIO = sys.stdin) -> List[Path]:
+    """Expand root arguments; '-' reads one root per line from stdin"""
+    paths: List[Path] = []
+    for root in roots:
+        if root == "-":
+            paths.extend(Path(line.strip()) for line in stdin if line.strip())
+        else:
+            paths.append(Path(root))
+    return paths
+
+
+class BatchVerifier:
+    """Verify package trees with a shared digest cache and worker pool"""
+
+    def __init__(self, cache_path: Optional[Path] = None, jobs: int = 1,
+                 hash_workers: Optional[int] = None, verify_mode: str = "all"):
+        self.cache: Optional[DigestCache] = None
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache = DigestCache(cache_path)
+        self.hash_workers = hash_workers
+        self.verify_mode = verify_mode
+        self.pool: Optional[ThreadPoolExecutor] = None
+        if jobs > 1:
+            self.pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="verify")
+
+    def verify(self, root: Path, verify_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Verify one tree; returns a JSON-serialisable result"""
+        root = Path(root)
+        if not root.is_dir():
+            return {"root": str(root), "ok": False, "results": {"status": "failed"},
+                    "errors": [f"Not a directory: {root}"], "warnings": []}
+
+        builder = ActivatorBuilder(create_backup=False, log_format="none", base_dir=root,
+                                   use_cache=self.cache is not None, digest_cache=self.cache,
+                                   verify_pool=self.pool, hash_workers=self.hash_workers,
+                                   verify_mode=verify_mode or self.verify_mode)
+        with builder:
+            ok, results = builder.verify_checksums()
+            return {
+                "root": str(root),
+                "ok": ok,
+                "results": results,
+                "errors": list(builder.errors),
+                "warnings": list(builder.warnings),
+            }
+
+    def verify_all(self, roots: Iterable[Path]) -> List[Dict[str, Any]]:
+        results = [self.verify(root) for root in roots]
+        self.flush()
+        return results
+
+    def flush(self):
+        """Persist new cache entries"""
+        if self.cache is not None:
+            self.cache.flush()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def __enter__(self) -> "BatchVerifier":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def remove_stale_socket(socket_path: Path):
+    """Remove a socket left by a previous daemon
+
+    Raises FileExistsError if socket_path is not a socket (a mistyped
+    --serve argument must not delete a file) or a daemon still answers on it.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "Not a socket, refusing to replace it", str(socket_path))
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        socket_path.unlink()
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(errno.EADDRINUSE, "Socket is in use by a running daemon", str(socket_path))
+
+
+def serve(socket_path: Path, verifier: BatchVerifier, log: TextIO = sys.stderr):
+    """Answer verify requests on a Unix socket until interrupted
+
+    Protocol: one JSON object per line, e.g. {"op": "verify", "root": "/pkg"}
+    (optionally with "mode": "fast" or "all") or {"op": "ping"}; every
+    request gets one JSON line back.
+    """
+    import signal
+    import socketserver
+
+    flush_lock = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    op = request.get("op", "verify")
+                    if op == "ping":
+                        response: Dict[str, Any] = {"ok": True}
+                    elif op == "verify":
+                        response = verifier.verify(Path(request["root"]), request.get("mode"))
+                        with flush_lock:
+                            verifier.flush()
+                    else:
+                        response = {"ok": False, "errors": [f"Unknown op: {op}"]}
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    response = {"ok": False, "errors": [f"Bad request: {e}"]}
+                self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode('utf-8'))
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    remove_stale_socket(socket_path)
+    signal.signal(signal.SIGTERM, stop)
+    with Server(str(socket_path), Handler) as server:
+        log.write(f"Listening on {socket_path}\n")
+        log.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink()
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark harness for the checksum engine and ActivatorBuilder
+
+Generates synthetic package trees (payloads from KB to GB, manifests with
+1..10k HWIndex/Scripts entries) in a temporary directory and reports
+throughput, latency percentiles and peak RSS as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import platform
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .backends import candidates as backend_candidates, describe as describe_backend
+from .constants import CHECKSUM_SIZE, HASH_WORKERS
+from .hashing import calculate_block_checksums, calculate_sha256
+
+DEFAULT_PAYLOAD_SIZES = ["4K", "1M", "64M"]
+DEFAULT_ENTRY_COUNTS = [1, 100, 1000]
+_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+# Backends are timed on in-memory data of at most this size
+BACKEND_PROBE_LIMIT = 64 * 1024 ** 2
+
+
+def parse_size(text: str) -> int:
+    """'4K', '64M', '1G' or plain bytes"""
+    text = text.strip().upper()
+    if text and text[-1] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(text)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far (None if unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None,
+            nbytes: int = 0) -> Dict[str, Any]:
+    """Run func `repeat` times and summarise latency (seconds) and throughput"""
+    samples: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    result: Dict[str, Any] = {
+        "runs": len(samples),
+        "min_s": min(samples),
+        "mean_s": sum(samples) / len(samples),
+        "p50_s": percentile(samples, 50),
+        "p90_s": percentile(samples, 90),
+        "p99_s": percentile(samples, 99),
+        "max_s": max(samples),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+    if nbytes:
+        result["bytes"] = nbytes
+        result["throughput_mib_s"] = nbytes / percentile(samples, 50) / 1024 ** 2
+    return result
+
+
+def write_payload(file_path: Path, size: int, chunk: int = 16 * 1024 * 1024):
+    """Pseudo-random payload without holding it in memory"""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    seed = hashlib.sha256(str(size).encode()).digest()
+    pattern = (seed * (chunk // len(seed) + 1))[:chunk]
+    with open(file_path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            n = min(remaining, chunk)
+            f.write(pattern[:n])
+            remaining -= n
+
+
+def generate_tree(root: Path, entries: int, payload_size: int = 4096) -> Path:
+    """Package tree whose module has `entries` HWIndex entries, each with one script"""
+    meta = root / "Meta" / "Normal_release_2"
+    device = meta / "bench_device"
+    module = device / "bench.module"
+    module.mkdir(parents=True, exist_ok=True)
+
+    def dump(path: Path, data: Dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=4), encoding='utf-8')
+
+    dump(root / "Meta" / "multi_activator.mnf", {
+        "Manifest": "1.0.0", "PackageName": "Bench", "PackageType": "multirelease",
+        "Includes": [{"PackageName": "Normal_release_2/main.mnf"}]})
+    dump(meta / "main.mnf", {
+        "Manifest": "1.0.0", "PackageName": "BENCH_MAIN", "PackageType": "main",
+        "Includes": [{"PackageName": "bench_device", "PackageVersion": "1.0.0"}],
+        "UpdateOrder": [{"Type": "parallel", "Devices": [["bench_device"]]}]})
+    dump(device / "1.0.0.mnf", {
+        "Manifest": "1.0.0", "PackageName": "bench_device", "PackageType": "device",
+        "Includes": [{"PackageName": "bench.module", "PackageVersion": "1.0.0"}]})
+
+    hw_index = []
+    for i in range(entries):
+        rel = f"bench.module/{i}"
+        write_payload(root / "Data" / rel / "activation.sh", payload_size)
+        dump(root / "Data" / rel / "installer.txt", {
+            "Type": "script",
+            "Scripts": [{"Path": f"{rel}/activation.sh", "Length": 0,
+                         "CheckSumSize": CHECKSUM_SIZE, "CheckSum": []}]})
+        hw_index.append({"Index": str(i), "ModuleVersion": "1.0.0",
+                         "InstallerFile": f"{rel}/installer.txt",
+                         "CheckSum": [], "CheckSumSize": CHECKSUM_SIZE})
+    dump(module / "1.0.0.mnf", {
+        "Manifest": "1.0.0", "PackageName": "bench.module", "PackageVersion": "1.0.0",
+        "PackageType": "module", "HWIndex": hw_index})
+    return root
+
+
+def bench_hashing(work_dir: Path, sizes: List[int], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        payload = work_dir / f"payload_{size}.bin"
+        write_payload(payload, size)
+        results[str(size)] = {
+            "calculate_sha256": measure(lambda: calculate_sha256(payload), repeat, nbytes=size),
+            "calculate_block_checksums": measure(
+                lambda: calculate_block_checksums(payload), repeat, nbytes=size),
+        }
+        payload.unlink()
+    return results
+
+
+def bench_backends(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    """In-memory throughput of every SHA-256 backend that passes its self-test"""
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        data = os.urandom(min(size, BACKEND_PROBE_LIMIT))
+        results[str(len(data))] = {
+            backend.name: measure(lambda: backend.new(data).digest(), repeat, nbytes=len(data))
+            for backend in backend_candidates()
+        }
+    return results
+
+
+def bench_json(work_dir: Path, counts: List[int], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for count in counts:
+        data = {"HWIndex": [{"Index": str(i), "InstallerFile": f"m/{i}/installer.txt",
+                             "CheckSum": ["0" * 64], "CheckSumSize": CHECKSUM_SIZE}
+                            for i in range(count)]}
+        path = work_dir / f"manifest_{count}.mnf"
+        path.write_text(json.dumps(data, indent=4), encoding='utf-8')
+        nbytes = path.stat().st_size
+        results[str(count)] = {
+            "load": measure(lambda: json.loads(path.read_text(encoding='utf-8')), repeat, nbytes=nbytes),
+            "dump": measure(lambda: path.write_text(json.dumps(data, indent=4), encoding='utf-8'),
+                            repeat, nbytes=nbytes),
+        }
+        path.unlink()
+    return results
+
+
+def bench_builder(work_dir: Path, counts: List[int], repeat: int, payload_size: int) -> Dict[str, Any]:
+    from .builder import ActivatorBuilder
+
+    def builder(root: Path) -> ActivatorBuilder:
+        return ActivatorBuilder(create_backup=False, use_cache=False, log_format="none",
+                                base_dir=root)
+
+    def run(root: Path, step: str):
+        with builder(root) as b:
+            getattr(b, step)()
+
+    results: Dict[str, Any] = {}
+    for count in counts:
+        root = generate_tree(work_dir / f"tree_{count}", count, payload_size)
+        nbytes = count * payload_size
+        results[str(count)] = {
+            step: measure(lambda: run(root, step), repeat, nbytes=nbytes)
+            for step in ("update_checksums", "verify_checksums", "run_full_build")
+        }
+        shutil.rmtree(root)
+    return results
+
+
+def run_benchmarks(sizes: List[int], counts: List[int], repeat: int = 5,
+                   payload_size: int = 4096, work_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Run all benchmark groups and return a JSON-serialisable report"""
+    with tempfile.TemporaryDirectory(prefix="men3_bench_", dir=work_dir) as tmp:
+        tmp_path = Path(tmp)
+        report: Dict[str, Any] = {
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "hash_workers": HASH_WORKERS,
+                "checksum_size": CHECKSUM_SIZE,
+                "hash_backend": describe_backend(),
+            },
+            "hashing": bench_hashing(tmp_path, sizes, repeat),
+            "hash_backends": bench_backends(sizes, repeat),
+            "json": bench_json(tmp_path, counts, repeat),
+            "builder": bench_builder(tmp_path, counts, repeat, payload_size),
+        }
+    report["peak_rss_bytes"] = peak_rss_bytes()
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmarks for LG MEN3 Activator tools')
+    parser.add_argument('--sizes', default=",".join(DEFAULT_PAYLOAD_SIZES),
+                        help='Payload sizes to hash, e.g. 4K,1M,64M,1G')
+    parser.add_argument('--entries', default=",".join(str(c) for c in DEFAULT_ENTRY_COUNTS),
+                        help='HWIndex/Scripts entry counts, e.g. 1,100,10000')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement')
+    parser.add_argument('--payload-size', default="4K",
+                        help='Size of each script in generated trees')
+    parser.add_argument('--work-dir', type=Path, help='Where to create temporary trees')
+    parser.add_argument('--output', type=Path, help='Write JSON report to file instead of stdout')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        sizes=[parse_size(s) for s in args.sizes.split(",") if s],
+        counts=[int(c) for c in args.entries.split(",") if c],
+        repeat=max(1, args.repeat),
+        payload_size=parse_size(args.payload_size),
+        work_dir=args.work_dir,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding='utf-8')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1054 @@
+# -*- coding: utf-8 -*-
+"""
+ActivatorBuilder: update and verify checksums of a package tree
+"""
+
+import os
+import sys
+import stat
+import time
+import json
+import queue
+import threading
+import sqlite3
+import logging
+import logging.handlers
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Tuple, Optional, Union
+
+from . import colors
+from .constants import (ASYNC_PREFETCH, BACKUP_DIR_NAME, BASE_DIR, CACHE_FILE_NAME,
+                        CHECKSUM_SIZE, DEPLOY_JOBS, INDEX_FILE_NAME, LOG_RETENTION)
+from .backends import get_backend
+from .cache import DigestCache
+from .hashing import (calculate_block_checksums_cached, calculate_buffer_checksums,
+                      calculate_sha256, find_mismatched_block)
+from .logs import LOG_LEVELS, RAW_LEVEL, ConsoleFormatter, JsonFormatter, skip_raw
+from .manifest import ChecksumRef, ManifestGraph, ManifestNode
+from .metrics import IOStats, format_bytes, timed_phase
+
+if TYPE_CHECKING:
+    from .backup import BackupStore
+
+
+VERIFY_MODES = ("all", "fast")
+
+
+class ActivatorBuilder:
+    """Class for automating activator build"""
+    
+    def __init__(self, create_backup: bool = True, verbose: bool = True,
+                 hash_workers: Optional[int] = None, use_cache: bool = True,
+                 base_dir: Path = BASE_DIR, incremental: bool = False,
+                 verify_workers: int = 1, log_format: str = "text",
+                 log_file: Optional[Path] = None, backup_keep: Optional[int] = None,
+                 digest_cache: Optional[DigestCache] = None,
+                 verify_pool: Optional[ThreadPoolExecutor] = None,
+                 async_io: bool = False, prefetch: int = ASYNC_PREFETCH,
+                 verify_mode: str = "all"):
+        """digest_cache and verify_pool may be shared between builders; the
+        caller owns them and they are not closed by close().
+
+        verify_mode "all" hashes every file and reports every difference;
+        "fast" checks sizes first, stops hashing a file at its first bad
+        block and stops verification at the first failed file.
+        """
+        if verify_mode not in VERIFY_MODES:
+            raise ValueError(f"Unknown verify mode: {verify_mode}")
+        self._start_logging(log_format, log_file)
+        self.stats = IOStats()
+        self.base_dir = base_dir
+        self.verify_workers = max(1, verify_workers)
+        self.incremental = incremental
+        self.backup_dir = base_dir / BACKUP_DIR_NAME
+        self.create_backup = create_backup
+        self.backup_keep = backup_keep
+        self.verbose = verbose
+        self.hash_workers = hash_workers
+        self.backup_files: List[Dict[str, str]] = []
+        self.graph: Optional[ManifestGraph] = None
+        self.verify_pool = verify_pool
+        self.async_io = async_io
+        self.prefetch = prefetch
+        self.verify_mode = verify_mode
+        self.digest_cache: Optional[DigestCache] = digest_cache
+        self._owns_cache = False
+        if use_cache and digest_cache is None:
+            self._owns_cache = True
+            try:
+                self.digest_cache = DigestCache(base_dir / CACHE_FILE_NAME)
+            except sqlite3.Error as e:
+                self.log(f"Digest cache disabled ({CACHE_FILE_NAME}): {e}", "warning")
+        self._backup_store: Optional["BackupStore"] = None
+    
+    def _start_logging(self, log_format: str, log_file: Optional[Path]):
+        """Route messages through a queue to a background writer thread"""
+        # Only the most recent messages are kept in memory; counts are exact
+        self.errors: Deque[str] = deque(maxlen=LOG_RETENTION)
+        self.warnings: Deque[str] = deque(maxlen=LOG_RETENTION)
+        self.info: Deque[str] = deque(maxlen=LOG_RETENTION)
+        self.error_count = 0
+        self.warning_count = 0
+        
+        handlers: List[logging.Handler] = []
+        if log_format != "none":
+            if log_format != "json":
+                # Before the handler captures sys.stdout (colorama wraps it)
+                colors.init()
+            console = logging.StreamHandler(sys.stdout)
+            if log_format == "json":
+                console.setFormatter(JsonFormatter())
+                console.addFilter(skip_raw)
+            else:
+                console.setFormatter(ConsoleFormatter())
+            handlers.append(console)
+        if log_file is not None:
+            json_file = logging.FileHandler(str(log_file), encoding='utf-8')
+            json_file.setFormatter(JsonFormatter())
+            json_file.addFilter(skip_raw)
+            handlers.append(json_file)
+        
+        # Standalone logger: not registered globally, so builders can come and go
+        self._logger = logging.Logger("activator", logging.DEBUG)
+        self._log_handlers = handlers
+        self._log_listener: Optional[logging.handlers.QueueListener] = None
+        if not handlers:
+            # Silent (in-process) use: only counters and retained messages
+            self._logger.disabled = True
+            return
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+        self._logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self._log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+        self._log_listener.start()
+    
+    def flush_log(self):
+        """Wait until the log writer has written every queued message"""
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener.start()
+    
+    def close(self):
+        """Flush and close the digest cache and the log writer"""
+        if self.digest_cache is not None and self._owns_cache:
+            try:
+                self.digest_cache.close()
+            except sqlite3.Error as e:
+                self.log(f"Failed to save digest cache: {e}", "warning")
+            self.digest_cache = None
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
+            for handler in self._log_handlers:
+                handler.close()
+    
+    def __enter__(self) -> "ActivatorBuilder":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def log(self, message: str, level: str = "info"):
+        """Logging with colors (written asynchronously)"""
+        if level == "error":
+            self.errors.append(message)
+            self.error_count += 1
+        elif level == "warning":
+            self.warnings.append(message)
+            self.warning_count += 1
+        elif level == "info":
+            self.info.append(message)
+        
+        log_level = LOG_LEVELS[level][0] if level in LOG_LEVELS else logging.INFO
+        self._logger.log(log_level, message, extra={"activator_level": level})
+    
+    def console(self, text: str = ""):
+        """Write a plain line to the console, ordered with log messages"""
+        self._logger.info(text, extra={"activator_level": RAW_LEVEL})
+    
+    def calculate_sha256(self, file_path: Path) -> str:
+        """Calculate SHA256 hash of file"""
+        try:
+            return calculate_sha256(file_path)
+        except Exception as e:
+            self.log(f"Error calculating hash {file_path}: {e}", "error")
+            return ""
+    
+    def calculate_checksums(self, file_path: Path, block_size: int = CHECKSUM_SIZE) -> List[bytes]:
+        """Calculate CheckSum list (SHA256 per CheckSumSize block) of file"""
+        try:
+            return calculate_block_checksums_cached(
+                file_path, block_size, self.hash_workers, self.digest_cache, self.stats)
+        except Exception as e:
+            self.log(f"Error calculating hash {file_path}: {e}", "error")
+            return []
+    
+    @property
+    def backup_store(self) -> "BackupStore":
+        """Backup store, created on first use"""
+        if self._backup_store is None:
+            from .backup import BackupStore
+            self._backup_store = BackupStore(self.backup_dir, self.base_dir, self.digest_cache)
+        return self._backup_store
+    
+    def create_backup_file(self, file_path: Path) -> bool:
+        """Create backup of file"""
+        if not self.create_backup:
+            return True
+            
+        try:
+            entry, created = self.backup_store.store(file_path)
+            self.backup_files.append(entry)
+            if self.verbose:
+                state = "created" if created else "unchanged, reused"
+                self.log(f"Backup {state}: {entry['path']} ({entry['digest'][:12]})", "info")
+            return True
+        except Exception as e:
+            self.log(f"Failed to create backup {file_path}: {e}", "warning")
+            return False
+    
+    def gc_backups(self, keep: Optional[int] = None) -> bool:
+        """Apply backup retention and delete unreferenced backup objects"""
+        try:
+            dropped, deleted = self.backup_store.gc(keep)
+            self.log(f"Backups cleaned: {dropped} old entries, {deleted} objects removed", "success")
+            return True
+        except Exception as e:
+            self.log(f"Failed to clean backups: {e}", "warning")
+            return False
+    
+    def load_graph(self) -> ManifestGraph:
+        """Load the manifest graph once and reuse it across steps"""
+        if self.graph is None:
+            self.graph = ManifestGraph.load(self.base_dir)
+            for error in self.graph.errors:
+                self.log(error, "error")
+            for node in self.graph.nodes.values():
+                try:
+                    self.stats.add(node.path, files_read=1, bytes_read=node.path.stat().st_size)
+                except OSError:
+                    pass
+        return self.graph
+    
+    def serialize_json(self, node: ManifestNode) -> bytes:
+        """Manifest/installer JSON in package format, keeping the file's line endings"""
+        data = json.loads(node.path.read_bytes().decode('utf-8'))
+        for ref in node.checksums:
+            entry = data[ref.path[0]][ref.path[1]]
+            entry.update(ref.entry.fields())
+            if node.kind == "installer":
+                entry.pop('ExtraFiles', None)
+        text = json.dumps(data, indent=4, ensure_ascii=False)
+        if node.newline != "\n":
+            text = text.replace("\n", node.newline)
+        return text.encode('utf-8')
+    
+    def render_manifest(self, node: ManifestNode) -> bytes:
+        """New manifest content: the file's own bytes with only checksum fields patched"""
+        from .patcher import JSON_DELETE, patch_json_entries
+        
+        updates: Dict[Tuple, Dict[str, Any]] = {}
+        for ref in node.checksums:
+            fields = ref.entry.fields()
+            if node.kind == "installer":
+                fields['ExtraFiles'] = JSON_DELETE
+            updates[ref.path] = fields
+        try:
+            raw = node.path.read_bytes()
+            self.stats.add(node.path, files_read=1, bytes_read=len(raw))
+            text = patch_json_entries(raw.decode('utf-8'), updates, node.newline)
+            # Never stage a patch that does not parse back
+            json.loads(text)
+            return text.encode('utf-8')
+        except (OSError, ValueError) as e:
+            self.log(f"Rewriting {node.path.name} in full ({e})", "warning")
+            return self.serialize_json(node)
+    
+    @timed_phase("check_files_exist")
+    def check_files_exist(self) -> bool:
+        """Check if all required files exist"""
+        self.log("Checking for files...", "step")
+        
+        graph = self.load_graph()
+        all_exist = not graph.errors
+        
+        for node in graph.order:
+            self.log(f"File found: {graph.relative(node.path)}", "success")
+        
+        for file_path in graph.payloads:
+            if file_path.exists():
+                self.log(f"File found: {graph.relative(file_path)}", "success")
+            else:
+                self.log(f"File not found: {file_path.name} ({file_path})", "error")
+                all_exist = False
+        
+        return all_exist
+    
+    @timed_phase("update_checksums")
+    def update_checksums(self) -> bool:
+        """Update all checksums"""
+        self.log("Updating checksums...", "step")
+        
+        graph = self.load_graph()
+        if graph.errors:
+            self.log("Manifest graph is incomplete", "error")
+            return False
+        
+        # Only installer.txt and module .mnf files carry checksums
+        nodes = [node for node in graph.order if node.checksums]
+        
+        # Walk children-first: payload -> installer.txt -> module .mnf,
+        # so a rewritten installer.txt is hashed again by its module.
+        # New manifests are staged and only replace the originals together.
+        from .writer import ManifestTransaction
+        
+        staged_checksums: Dict[Path, Tuple[int, List[bytes]]] = {}
+        with ManifestTransaction() as txn:
+            for node in nodes:
+                name = graph.relative(node.path)
+                self.log(f"Updating {name}...", "info")
+                try:
+                    changed = False
+                    for ref in node.checksums:
+                        self.log(f"Calculating SHA256 for {ref.target.name}...", "info")
+                        if ref.target in txn:
+                            # Rewritten in this run: hash the staged content
+                            content = txn.content(ref.target)
+                            file_size = len(content)
+                            start = time.perf_counter()
+                            hashes = calculate_buffer_checksums(content, ref.block_size)
+                            self.stats.add(bytes_hashed=file_size,
+                                           hash_seconds=time.perf_counter() - start)
+                            staged_checksums[ref.target] = (ref.block_size, hashes)
+                        elif not ref.target.exists():
+                            self.log(f"File {graph.relative(ref.target)} not found!", "error")
+                            return False
+                        else:
+                            file_size = ref.target.stat().st_size
+                            hashes = self.calculate_checksums(ref.target, ref.block_size)
+                            if not hashes:
+                                return False
+                        
+                        self.log(f"Size: {file_size} bytes", "info")
+                        self.log(f"SHA256: {hashes[0].hex()}", "info")
+                        if len(hashes) > 1:
+                            self.log(f"Blocks: {len(hashes)} x {ref.block_size} bytes", "info")
+                        
+                        if self.apply_checksums(node, ref, file_size, hashes):
+                            changed = True
+                    
+                    # Untouched manifests keep their bytes and mtime
+                    if self.incremental and not changed:
+                        self.log(f"{name} up to date", "success")
+                        continue
+                    
+                    # Stage
+                    self.create_backup_file(node.path)
+                    content = self.render_manifest(node)
+                    txn.stage(node.path, content)
+                    self.stats.record_write(node.path, len(content))
+                    self.log(f"{name} updated", "success")
+                    
+                except Exception as e:
+                    self.log(f"Error updating {name}: {e}", "error")
+                    self.graph = None
+                    return False
+            
+            # Save
+            if len(txn):
+                try:
+                    txn.commit()
+                except Exception as e:
+                    self.log(f"Error saving manifests (all changes rolled back): {e}", "error")
+                    self.graph = None
+                    return False
+                self.log(f"{len(txn)} manifest(s) saved", "success")
+        
+        # Files just written were hashed from memory; remember their digests
+        if self.digest_cache is not None:
+            for file_path, (block_size, hashes) in staged_checksums.items():
+                self.digest_cache.put(file_path, block_size, os.stat(file_path), hashes)
+        
+        if self.backup_files and self.backup_keep is not None:
+            self.gc_backups(self.backup_keep)
+        
+        return True
+    
+    def apply_checksums(self, node: ManifestNode, ref: ChecksumRef,
+                        file_size: int, hashes: List[bytes]) -> bool:
+        """Store size and CheckSum list in a manifest entry, return True if it changed"""
+        entry = ref.entry
+        changed = False
+        
+        # Update data
+        if (node.kind == "installer" or entry.length is not None) and entry.length != file_size:
+            entry.length = file_size
+            changed = True
+        if entry.checksum != hashes:
+            entry.checksum = list(hashes)
+            changed = True
+        if entry.checksum_size != ref.block_size:
+            entry.checksum_size = ref.block_size
+            changed = True
+        
+        # Remove ExtraFiles to bypass signature verification
+        if node.kind == "installer":
+            if entry.extra_files:
+                entry.extra_files = False
+                changed = True
+                self.log("ExtraFiles section removed (signature bypass)", "success")
+            else:
+                self.log("ExtraFiles section absent (bypass active)", "success")
+        
+        return changed
+    
+    @timed_phase("verify_checksums")
+    def verify_checksums(self) -> Tuple[bool, Dict[str, str]]:
+        """Verify all checksums"""
+        self.log("Verifying checksums...", "step")
+        
+        results: Dict[str, str] = {}
+        
+        graph = self.load_graph()
+        if graph.errors:
+            self.log("Required files not found", "error")
+            results['status'] = 'failed'
+            return False, results
+        
+        all_ok = True
+        
+        # Hash every checked file up front on a bounded pool; map() keeps
+        # graph order so logging and the results dict stay deterministic
+        checks = [(node, ref) for node in graph.order for ref in node.checksums]
+        if self.verify_mode == "fast":
+            return self._verify_fast(graph, checks)
+        if self.async_io:
+            import asyncio
+            from .aio import measure_files_async
+            measured = asyncio.run(measure_files_async(
+                [(ref.target, ref.block_size) for _, ref in checks], self.prefetch,
+                self.verify_workers, self.hash_workers, self.digest_cache, self.stats))
+        elif self.verify_pool is not None:
+            measured = list(self.verify_pool.map(self._measure, [ref for _, ref in checks]))
+        elif self.verify_workers > 1 and len(checks) > 1:
+            with ThreadPoolExecutor(max_workers=self.verify_workers,
+                                    thread_name_prefix="verify") as pool:
+                measured = list(pool.map(self._measure, [ref for _, ref in checks]))
+        else:
+            measured = [self._measure(ref) for _, ref in checks]
+        
+        for (node, ref), (actual_size, actual_hashes, error) in zip(checks, measured):
+            key = graph.relative(ref.target)
+            self.log(f"Verifying {ref.target.name} in {node.path.name}...", "info")
+            
+            if actual_size is None:
+                self.log(f"File not found: {key}", "error")
+                results[key] = 'missing'
+                all_ok = False
+                continue
+            
+            try:
+                if error is not None:
+                    raise error
+                expected = ref.entry.checksum
+                
+                if actual_hashes == expected:
+                    self.log(f"✅ {ref.target.name} checksum matches", "success")
+                    results.setdefault(key, 'ok')
+                else:
+                    self.log(f"❌ {ref.target.name} checksum mismatch", "error")
+                    self.log(f"   Expected: {ref.entry.checksum_hex()}", "error")
+                    self.log(f"   Got:      {[h.hex() for h in actual_hashes]}", "error")
+                    if len(actual_hashes) == len(expected) > 1:
+                        blocks = [str(i) for i, (a, b) in enumerate(zip(actual_hashes, expected))
+                                  if a != b]
+                        self.log(f"   Differing blocks: {', '.join(blocks)}", "error")
+                    results[key] = 'mismatch'
+                    all_ok = False
+                
+                expected_size = ref.entry.length
+                if expected_size is not None and actual_size != expected_size:
+                    self.log(f"⚠️  File size mismatch: {actual_size} != {expected_size}", "warning")
+                
+                # Check ExtraFiles
+                if node.kind == "installer":
+                    if ref.entry.extra_files:
+                        self.log("⚠️  ExtraFiles section present (signature check may fail)", "warning")
+                    else:
+                        self.log("✅ ExtraFiles section removed (signature bypass active)", "success")
+            
+            except Exception as e:
+                self.log(f"Error verifying {graph.relative(node.path)}: {e}", "error")
+                results[key] = 'error'
+                all_ok = False
+        
+        results['status'] = 'ok' if all_ok else 'failed'
+        return all_ok, results
+    
+    @timed_phase("export")
+    def export_archive(self, archive_path: Path) -> bool:
+        """Update checksums and write Data/, Meta/ and common/ to a tar/zip archive
+
+        Each payload is read once: the chunks streamed into the archive are
+        also hashed into its CheckSum list. Manifests are then updated from
+        those digests (children-first, hashed from memory), saved in one
+        transaction and added to the archive as rendered.
+        """
+        from .export import ArchiveWriter, iter_export_files
+        from .writer import ManifestTransaction
+        
+        self.log(f"Exporting to {archive_path}...", "step")
+        graph = self.load_graph()
+        if graph.errors:
+            self.log("Manifest graph is incomplete", "error")
+            return False
+        
+        payload_sizes: Dict[Path, set] = {}
+        for node in graph.order:
+            if node.kind == "installer":
+                for ref in node.checksums:
+                    payload_sizes.setdefault(ref.target, set()).add(ref.block_size)
+        
+        archive_path = archive_path.resolve()
+        try:
+            with ArchiveWriter(archive_path) as archive:
+                # 1. Payloads: archived and hashed from the same read
+                measured: Dict[Tuple[Path, int], Tuple[int, List[bytes]]] = {}
+                for target, block_sizes in payload_sizes.items():
+                    name = graph.relative(target)
+                    if not target.exists():
+                        self.log(f"File {name} not found!", "error")
+                        return False
+                    self.log(f"Archiving and hashing {name}...", "info")
+                    st = os.stat(target)
+                    start = time.perf_counter()
+                    size, checksums = archive.add_file(target, name, block_sizes)
+                    self.stats.record_read(target, size, time.perf_counter() - start)
+                    for block_size, hashes in checksums.items():
+                        measured[(target, block_size)] = (size, hashes)
+                        if self.digest_cache is not None and size == st.st_size:
+                            self.digest_cache.put(target, block_size, st, hashes)
+                
+                # 2. Manifests, children-first, from the digests above
+                contents: Dict[Path, bytes] = {}
+                with ManifestTransaction() as txn:
+                    for node in graph.order:
+                        changed = False
+                        for ref in node.checksums:
+                            if ref.target in contents:
+                                content = contents[ref.target]
+                                file_size = len(content)
+                                hashes = calculate_buffer_checksums(content, ref.block_size)
+                            else:
+                                file_size, hashes = measured[(ref.target, ref.block_size)]
+                            if self.apply_checksums(node, ref, file_size, hashes):
+                                changed = True
+                        if node.checksums:
+                            contents[node.path] = self.render_manifest(node)
+                        else:
+                            contents[node.path] = node.path.read_bytes()
+                        if changed:
+                            self.create_backup_file(node.path)
+                            txn.stage(node.path, contents[node.path])
+                            self.stats.record_write(node.path, len(contents[node.path]))
+                    if len(txn):
+                        txn.commit()
+                        self.log(f"{len(txn)} manifest(s) saved", "success")
+                
+                for path, content in contents.items():
+                    archive.add_bytes(graph.relative(path), content, path.stat().st_mtime,
+                                      stat.S_IMODE(path.stat().st_mode))
+                
+                # 3. Everything else (signatures, common/ ...) as is
+                for file_path in iter_export_files(self.base_dir):
+                    if file_path in payload_sizes or file_path in contents \
+                            or file_path in (archive_path, archive.tmp_path):
+                        continue
+                    size, _ = archive.add_file(file_path, graph.relative(file_path))
+                    self.stats.add(file_path, files_read=1, bytes_read=size)
+                
+                archive.commit()
+        except Exception as e:
+            self.log(f"Export failed: {e}", "error")
+            self.graph = None
+            return False
+        
+        self.stats.record_write(archive_path, archive_path.stat().st_size)
+        self.log(f"Archive written: {archive_path} ({format_bytes(archive_path.stat().st_size)})",
+                 "success")
+        return True
+    
+    @timed_phase("deploy")
+    def deploy(self, dest_dir: Path, jobs: Optional[int] = None) -> Tuple[bool, Dict[str, str]]:
+        """Copy Data/, Meta/ and common/ to dest_dir, verifying every copy by reading it back
+
+        Files with a manifest CheckSum are checked against it; other files
+        against the digests of their source.
+        """
+        from .deploy import deploy_file
+        from .export import iter_export_files
+        from .writer import fsync_dirs
+        
+        self.log(f"Deploying to {dest_dir}...", "step")
+        results: Dict[str, str] = {}
+        graph = self.load_graph()
+        dest_dir = dest_dir.resolve()
+        if graph.errors:
+            self.log("Manifest graph is incomplete", "error")
+            results['status'] = 'failed'
+            return False, results
+        if dest_dir == self.base_dir.resolve():
+            self.log("Destination is the package itself", "error")
+            results['status'] = 'failed'
+            return False, results
+        
+        expected: Dict[Path, Tuple[int, List[bytes], Optional[int]]] = {}
+        for node in graph.order:
+            for ref in node.checksums:
+                expected.setdefault(ref.target, (ref.block_size, ref.entry.checksum, ref.entry.length))
+        
+        def deploy_one(src: Path) -> str:
+            block_size, digests, length = expected.get(src, (CHECKSUM_SIZE, None, None))
+            if digests is None:
+                length = src.stat().st_size
+                digests = calculate_block_checksums_cached(
+                    src, block_size, self.hash_workers, self.digest_cache, self.stats)
+            dst = dest_dir / graph.relative(src)
+            method = deploy_file(src, dst, digests, block_size, self.hash_workers, length)
+            size = dst.stat().st_size
+            # Source read by the copy, destination read back and hashed
+            self.stats.add(src, files_read=2, bytes_read=2 * size, bytes_hashed=size)
+            self.stats.record_write(dst, size)
+            return method
+        
+        files = list(iter_export_files(self.base_dir))
+        workers = DEPLOY_JOBS if jobs is None else max(1, jobs)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deploy") as pool:
+            futures = [(src, pool.submit(deploy_one, src)) for src in files]
+            all_ok = True
+            for src, future in futures:
+                key = graph.relative(src)
+                try:
+                    method = future.result()
+                except ValueError as e:
+                    self.log(f"❌ {key}: {e}", "error")
+                    results[key] = 'mismatch'
+                    all_ok = False
+                    continue
+                except OSError as e:
+                    self.log(f"Error deploying {key}: {e}", "error")
+                    results[key] = 'error'
+                    all_ok = False
+                    continue
+                self.log(f"{key} copied ({method}) and verified", "success")
+                results[key] = 'ok'
+        
+        try:
+            fsync_dirs({(dest_dir / graph.relative(src)).parent for src in files
+                        if results.get(graph.relative(src)) == 'ok'})
+        except OSError as e:
+            self.log(f"Failed to sync {dest_dir}: {e}", "warning")
+        
+        if all_ok:
+            self.log(f"✅ {len(files)} files deployed and verified", "success")
+        results['status'] = 'ok' if all_ok else 'failed'
+        return all_ok, results
+    
+    @timed_phase("diff")
+    def diff_trees(self, old_root: Path, new_root: Optional[Path] = None) -> Tuple[bool, Dict[str, Any]]:
+        """Compare two package trees (new_root defaults to this package) block by block
+
+        Returns (identical, report) with added/removed file lists and, per
+        modified file, sizes and differing block and byte ranges. A file
+        referenced in both trees but present on disk in only one counts as
+        added/removed; one present in neither is listed as missing.
+        """
+        from .diff import graph_files, modified_entry
+        
+        new_root = new_root or self.base_dir
+        self.log(f"Comparing {old_root} -> {new_root}...", "step")
+        report: Dict[str, Any] = {"added": [], "removed": [], "missing": [], "modified": {},
+                                  "unchanged": 0}
+        graphs = []
+        for root in (old_root, new_root):
+            graph = ManifestGraph.load(Path(root))
+            for error in graph.errors:
+                self.log(f"{root}: {error}", "error")
+            if graph.errors:
+                return False, report
+            graphs.append(graph)
+        old_files, new_files = graph_files(graphs[0]), graph_files(graphs[1])
+        
+        report["added"] = sorted(set(new_files) - set(old_files))
+        report["removed"] = sorted(set(old_files) - set(new_files))
+        common = sorted(set(old_files) & set(new_files))
+        
+        def stat_or_none(path: Path) -> Optional[os.stat_result]:
+            try:
+                return os.stat(path)
+            except FileNotFoundError:
+                return None
+        
+        def compare(key: str) -> Union[None, str, Dict[str, Any]]:
+            old_path = old_files[key][0]
+            new_path, block_size = new_files[key]
+            old_st, new_st = stat_or_none(old_path), stat_or_none(new_path)
+            if old_st is None or new_st is None:
+                return "removed" if old_st else "added" if new_st else "missing"
+            if (old_st.st_dev, old_st.st_ino) == (new_st.st_dev, new_st.st_ino):
+                return None
+            # The digest cache answers for every file whose stat is unchanged
+            old_hashes, new_hashes = (calculate_block_checksums_cached(
+                path, block_size, self.hash_workers, self.digest_cache, self.stats)
+                for path in (old_path, new_path))
+            if old_st.st_size == new_st.st_size and old_hashes == new_hashes:
+                return None
+            return modified_entry(old_st.st_size, new_st.st_size, block_size, old_hashes, new_hashes)
+        
+        if self.verify_workers > 1 and len(common) > 1:
+            with ThreadPoolExecutor(max_workers=self.verify_workers,
+                                    thread_name_prefix="diff") as pool:
+                compared = list(pool.map(compare, common))
+        else:
+            compared = [compare(key) for key in common]
+        
+        # Referenced on one side only: still a file the other tree lacks
+        for key in report["added"]:
+            if stat_or_none(new_files[key][0]) is None:
+                report["missing"].append(key)
+        for key in report["removed"]:
+            if stat_or_none(old_files[key][0]) is None:
+                report["missing"].append(key)
+        report["added"] = [key for key in report["added"] if key not in report["missing"]]
+        report["removed"] = [key for key in report["removed"] if key not in report["missing"]]
+        for key, change in zip(common, compared):
+            if isinstance(change, str):
+                report[change].append(key)
+        for name in ("added", "removed", "missing"):
+            report[name].sort()
+        
+        for key in report["added"]:
+            self.log(f"+ {key}", "info")
+        for key in report["removed"]:
+            self.log(f"- {key}", "info")
+        for key in report["missing"]:
+            self.log(f"! {key}: referenced but missing in both trees", "warning")
+        for key, change in zip(common, compared):
+            if change is None:
+                report["unchanged"] += 1
+                continue
+            if isinstance(change, str):
+                continue
+            report["modified"][key] = change
+            blocks = ", ".join(f"{start}" if end == start + 1 else f"{start}-{end - 1}"
+                               for start, end in change["blocks"])
+            self.log(f"~ {key}: {change['old_size']} -> {change['new_size']} bytes, "
+                     f"block(s) {blocks} of {change['block_size']}", "info")
+        
+        identical = not (report["added"] or report["removed"] or report["missing"]
+                         or report["modified"])
+        self.log(f"{len(report['added'])} added, {len(report['removed'])} removed, "
+                 f"{len(report['missing'])} missing, "
+                 f"{len(report['modified'])} modified, {report['unchanged']} unchanged",
+                 "success" if identical else "warning")
+        return identical, report
+    
+    @timed_phase("build_index")
+    def build_index(self, index_path: Optional[Path] = None) -> bool:
+        """Verify the tree, then record every Data/ and Meta/ file in the verification index"""
+        from .index import IndexEntry, iter_tree_files, write_index
+        
+        index_path = index_path or self.base_dir / INDEX_FILE_NAME
+        verify_ok, _ = self.verify_checksums()
+        if not verify_ok:
+            self.log("Verification failed, index not written", "error")
+            return False
+        
+        self.log("Building verification index...", "step")
+        graph = self.load_graph()
+        block_sizes = {ref.target: ref.block_size for node in graph.order for ref in node.checksums}
+        entries = []
+        try:
+            for file_path in iter_tree_files(self.base_dir):
+                # Stat before hashing: a concurrent edit then fails the stat check
+                st = os.stat(file_path)
+                block_size = block_sizes.get(file_path, CHECKSUM_SIZE)
+                checksums = calculate_block_checksums_cached(
+                    file_path, block_size, self.hash_workers, self.digest_cache, self.stats)
+                entries.append(IndexEntry(graph.relative(file_path), st.st_size, st.st_mtime_ns,
+                                          st.st_ino, block_size, checksums))
+            write_index(index_path, entries)
+            self.stats.record_write(index_path, index_path.stat().st_size)
+        except Exception as e:
+            self.log(f"Error writing index {index_path.name}: {e}", "error")
+            return False
+        
+        self.log(f"Index written: {index_path.name} ({len(entries)} files)", "success")
+        return True
+    
+    @timed_phase("verify_index")
+    def verify_index(self, index_path: Optional[Path] = None) -> Tuple[bool, Dict[str, str]]:
+        """Check the tree against the verification index, rehashing only files whose stat changed"""
+        from .index import IndexReader, iter_tree_files
+        
+        self.log("Verifying against index...", "step")
+        index_path = index_path or self.base_dir / INDEX_FILE_NAME
+        results: Dict[str, str] = {}
+        try:
+            reader = IndexReader(index_path)
+        except (OSError, ValueError) as e:
+            self.log(f"Cannot read index {index_path.name}: {e} (run --build-index)", "error")
+            results['status'] = 'failed'
+            return False, results
+        
+        all_ok = True
+        rehashed = 0
+        with reader:
+            self.stats.add(index_path, files_read=1, bytes_read=index_path.stat().st_size)
+            for entry in reader:
+                file_path = self.base_dir / entry.path
+                try:
+                    st = os.stat(file_path)
+                except FileNotFoundError:
+                    self.log(f"File not found: {entry.path}", "error")
+                    results[entry.path] = 'missing'
+                    all_ok = False
+                    continue
+                if entry.matches(st):
+                    results[entry.path] = 'ok'
+                    continue
+                
+                rehashed += 1
+                try:
+                    checksums = calculate_block_checksums_cached(
+                        file_path, entry.block_size, self.hash_workers, self.digest_cache, self.stats)
+                except Exception as e:
+                    self.log(f"Error verifying {entry.path}: {e}", "error")
+                    results[entry.path] = 'error'
+                    all_ok = False
+                    continue
+                if checksums == entry.checksums:
+                    self.log(f"{entry.path}: metadata changed, content identical", "info")
+                    results[entry.path] = 'ok'
+                else:
+                    self.log(f"❌ {entry.path} changed since the index was built", "error")
+                    results[entry.path] = 'mismatch'
+                    all_ok = False
+        
+        for file_path in iter_tree_files(self.base_dir):
+            key = file_path.relative_to(self.base_dir).as_posix()
+            if key not in results:
+                self.log(f"⚠️  Not in index: {key}", "warning")
+                results[key] = 'new'
+        
+        if all_ok:
+            self.log(f"✅ {len(reader)} indexed files match ({rehashed} rehashed)", "success")
+        results['status'] = 'ok' if all_ok else 'failed'
+        return all_ok, results
+    
+    def _verify_fast(self, graph: ManifestGraph,
+                     checks: List[Tuple[ManifestNode, ChecksumRef]]) -> Tuple[bool, Dict[str, str]]:
+        """Fast-fail verification: size pre-check, block-by-block compare, stop at first failure"""
+        results: Dict[str, str] = {}
+        failed = threading.Event()
+        
+        def check(ref: ChecksumRef) -> Tuple[str, str]:
+            if failed.is_set():
+                return 'skipped', ""
+            status, detail = self._check_streaming(ref)
+            if status != 'ok':
+                failed.set()
+            return status, detail
+        
+        refs = [ref for _, ref in checks]
+        if self.verify_pool is not None:
+            checked = list(self.verify_pool.map(check, refs))
+        elif self.verify_workers > 1 and len(refs) > 1:
+            with ThreadPoolExecutor(max_workers=self.verify_workers,
+                                    thread_name_prefix="verify") as pool:
+                checked = list(pool.map(check, refs))
+        else:
+            checked = [check(ref) for ref in refs]
+        
+        for (node, ref), (status, detail) in zip(checks, checked):
+            key = graph.relative(ref.target)
+            if status == 'skipped':
+                results.setdefault(key, status)
+                continue
+            self.log(f"Verifying {ref.target.name} in {node.path.name}...", "info")
+            if status == 'ok':
+                self.log(f"✅ {ref.target.name} checksum matches", "success")
+                results.setdefault(key, status)
+                if node.kind == "installer" and ref.entry.extra_files:
+                    self.log("⚠️  ExtraFiles section present (signature check may fail)", "warning")
+            else:
+                self.log(f"❌ {key}: {detail}", "error")
+                results[key] = status
+        
+        skipped = sum(1 for status, _ in checked if status == 'skipped')
+        if skipped:
+            self.log(f"Verification stopped at first failure, {skipped} check(s) skipped", "warning")
+        
+        all_ok = not failed.is_set()
+        results['status'] = 'ok' if all_ok else 'failed'
+        return all_ok, results
+    
+    def _check_streaming(self, ref: ChecksumRef) -> Tuple[str, str]:
+        """(status, detail) of one referenced file, reading no more than needed"""
+        try:
+            st = os.stat(ref.target)
+        except FileNotFoundError:
+            return 'missing', "file not found"
+        try:
+            expected = ref.entry.checksum
+            expected_size = ref.entry.length
+            if expected_size is not None and st.st_size != expected_size:
+                return 'mismatch', f"size {st.st_size} != Length {expected_size}"
+            blocks = max(1, -(-st.st_size // ref.block_size))
+            if blocks != len(expected):
+                return 'mismatch', f"{blocks} block(s) of {ref.block_size} bytes, CheckSum lists {len(expected)}"
+            
+            cache = self.digest_cache
+            cached = cache.get(ref.target, ref.block_size, st) if cache is not None else None
+            if cached is not None:
+                self.stats.add(ref.target, cache_hits=1)
+                bad = next((i for i, (a, b) in enumerate(zip(cached, expected))
+                            if a != b), None)
+            else:
+                start = time.perf_counter()
+                bad = find_mismatched_block(ref.target, expected, ref.block_size, self.hash_workers)
+                read = st.st_size if bad is None else min(st.st_size, (bad + 1) * ref.block_size)
+                self.stats.record_read(ref.target, read, time.perf_counter() - start)
+                if cache is not None:
+                    self.stats.add(cache_misses=1)
+                    if bad is None:
+                        cache.put(ref.target, ref.block_size, st, ref.entry.checksum)
+            
+            if bad is None:
+                return 'ok', ""
+            start = bad * ref.block_size
+            end = min(st.st_size, start + ref.block_size)
+            return 'mismatch', f"block {bad} (bytes {start}-{end}) checksum mismatch"
+        except Exception as e:
+            return 'error', str(e)
+    
+    def _measure(self, ref: ChecksumRef) -> Tuple[Optional[int], List[bytes], Optional[Exception]]:
+        """Size and CheckSum list of a referenced file (runs on verify workers)"""
+        try:
+            actual_size = ref.target.stat().st_size
+        except FileNotFoundError:
+            return None, [], None
+        try:
+            return actual_size, calculate_block_checksums_cached(
+                ref.target, ref.block_size, self.hash_workers, self.digest_cache,
+                self.stats), None
+        except Exception as e:
+            return actual_size, [], e
+    
+    def generate_report(self) -> str:
+        """Generate report"""
+        report = []
+        report.append("=" * 60)
+        report.append("LG MEN3 ACTIVATOR BUILD REPORT")
+        report.append("=" * 60)
+        report.append(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        report.append("")
+        
+        if self.error_count:
+            report.append(f"❌ ERRORS ({self.error_count}):")
+            for error in self.errors:
+                report.append(f"  - {error}")
+            report.append("")
+        
+        if self.warning_count:
+            report.append(f"⚠️  WARNINGS ({self.warning_count}):")
+            for warning in self.warnings:
+                report.append(f"  - {warning}")
+            report.append("")
+        
+        if self.backup_files:
+            report.append(f"📦 BACKUPS ({len(self.backup_files)}):")
+            for backup in self.backup_files:
+                report.append(f"  - {backup['path']} ({backup['digest'][:12]})")
+            report.append("")
+        
+        metrics = self.stats.summary()
+        if metrics["phases"]:
+            report.append("⏱️  PHASES:")
+            for name, phase in metrics["phases"].items():
+                report.append(f"  - {name}: {phase['wall_seconds']:.3f}s wall, "
+                              f"{phase['cpu_seconds']:.3f}s CPU, "
+                              f"{format_bytes(phase['bytes_read'])} read, "
+                              f"{format_bytes(phase['bytes_written'])} written")
+            report.append("")
+        
+        total = metrics["total"]
+        report.append("📈 I/O:")
+        report.append(f"  - Files touched: {total['files_touched']}")
+        report.append(f"  - Read: {format_bytes(total['bytes_read'])} in {total['files_read']} file(s)")
+        report.append(f"  - Written: {format_bytes(total['bytes_written'])} in {total['files_written']} file(s)")
+        if total["hash_mib_per_s"] is not None:
+            report.append(f"  - Hashed: {format_bytes(total['bytes_hashed'])} "
+                          f"at {total['hash_mib_per_s']:.1f} MiB/s")
+        if total["cache_hit_rate"] is not None:
+            report.append(f"  - Digest cache: {total['cache_hits']} hit(s), "
+                          f"{total['cache_misses']} miss(es) ({total['cache_hit_rate']:.0%})")
+        report.append("")
+        
+        report.append("=" * 60)
+        
+        return "\n".join(report)
+    
+    def report_data(self) -> Dict[str, Any]:
+        """Machine-readable report (--report-json)"""
+        return {
+            "date": datetime.now().isoformat(timespec='seconds'),
+            "base_dir": str(self.base_dir),
+            "error_count": self.error_count,
+            "warning_count": self.warning_count,
+            "errors": list(self.errors),
+            "warnings": list(self.warnings),
+            "backups": list(self.backup_files),
+            "hash_backend": get_backend().name,
+            **self.stats.summary(),
+        }
+    
+    def run_full_build(self) -> bool:
+        """Full automated build"""
+        self.console(f"{colors.BOLD}{colors.BLUE}{'='*60}{colors.RESET}")
+        self.console(f"{colors.BOLD}{colors.BLUE}LG MEN3 ACTIVATOR - FULL AUTOMATION{colors.RESET}")
+        self.console(f"{colors.BOLD}{colors.BLUE}{'='*60}{colors.RESET}\n")
+        
+        # Step 1: Check files
+        if not self.check_files_exist():
+            self.log("File check failed. Aborting.", "error")
+            return False
+        
+        # Step 2: Update checksums
+        if not self.update_checksums():
+            self.log("Checksum update failed. Aborting.", "error")
+            return False
+        
+        # Step 3: Verify result
+        verify_ok, results = self.verify_checksums()
+        
+        # Final report
+        self.console(f"\n{colors.BOLD}{'='*60}{colors.RESET}")
+        if verify_ok and not self.error_count:
+            self.console(f"{colors.GREEN}{colors.BOLD}✅ BUILD SUCCESSFULLY COMPLETED{colors.RESET}")
+            self.console(f"{colors.GREEN}All checksums updated and verified{colors.RESET}")
+            self.console(f"{colors.GREEN}Signature verification bypass active{colors.RESET}")
+        else:
+            self.console(f"{colors.RED}{colors.BOLD}❌ BUILD COMPLETED WITH ERRORS{colors.RESET}")
+            if self.error_count:
+                self.console(f"{colors.RED}Errors found: {self.error_count}{colors.RESET}")
+        
+        self.console(f"{colors.BOLD}{'='*60}{colors.RESET}\n")
+        
+        # Output report
+        if self.verbose:
+            self.console(self.generate_report())
+        
+        return verify_ok and self.error_count == 0
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent SQLite cache of CheckSum lists
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .constants import CACHE_BUSY_TIMEOUT, CACHE_MAX_ENTRIES
+
+# Bumped when the stored format changes (2: CheckSum lists as concatenated raw digests)
+CACHE_SCHEMA_VERSION = 2
+DIGEST_SIZE = 32
+
+
+def _split(blob: bytes) -> List[bytes]:
+    if not blob or len(blob) % DIGEST_SIZE:
+        raise ValueError("Malformed cache entry")
+    return [bytes(blob[i:i + DIGEST_SIZE]) for i in range(0, len(blob), DIGEST_SIZE)]
+
+
+class DigestCache:
+    """Persistent cache of CheckSum lists, keyed on file identity
+
+    An entry is reused only while the file's (size, mtime_ns, inode) still
+    match what was recorded when it was hashed, so any modification
+    invalidates it. Least recently used entries are evicted once the cache
+    holds more than max_entries files.
+
+    Several processes may share one cache file (batch runs in CI): the
+    database is in WAL mode, every put() commits on its own, and last-used
+    times are written in one short transaction by flush(). A database that
+    stays locked, is read-only or corrupt never fails the caller: the first
+    error disables the cache for the rest of the run.
+    """
+
+    def __init__(self, db_path: Path, max_entries: int = CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[Tuple[str, int], float] = {}
+        # Set by the first failed read or write: the rest of the run skips the cache
+        self.disabled = False
+        # Autocommit: no transaction stays open between calls. A lock held
+        # longer than the timeout is not worth waiting for (cache miss)
+        self._conn = sqlite3.connect(str(db_path), timeout=CACHE_BUSY_TIMEOUT,
+                                     check_same_thread=False, isolation_level=None)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            pass  # e.g. a filesystem without shared memory support: keep the rollback journal
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+            # Older caches stored hex JSON: start over rather than convert
+            self._conn.execute("DROP TABLE IF EXISTS digests")
+            self._conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            " path TEXT NOT NULL,"
+            " block_size INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " checksums BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (path, block_size))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS digests_lru ON digests (last_used)")
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return str(Path(file_path).resolve())
+
+    def get(self, file_path: Path, block_size: int,
+            st: Optional[os.stat_result] = None) -> Optional[List[bytes]]:
+        """Return cached CheckSum list if the file is unchanged, else None
+
+        A database that cannot be read (locked, corrupt) counts as a miss:
+        the cache only saves work, it must never fail a build.
+        """
+        st = st or os.stat(file_path)
+        key = self._key(file_path)
+        with self._lock:
+            row = checksums = None
+            if not self.disabled:
+                try:
+                    row = self._conn.execute(
+                        "SELECT size, mtime_ns, inode, checksums FROM digests"
+                        " WHERE path = ? AND block_size = ?", (key, block_size)
+                    ).fetchone()
+                    checksums = _split(row[3]) if row is not None else None
+                except (sqlite3.Error, ValueError):
+                    row = None
+                    self.disabled = True
+            if row is None or tuple(row[:3]) != (st.st_size, st.st_mtime_ns, st.st_ino):
+                self.misses += 1
+                return None
+            self._touched[(key, block_size)] = time.time()
+            self.hits += 1
+            return checksums
+
+    def put(self, file_path: Path, block_size: int, st: os.stat_result, checksums: List[bytes]):
+        """Store CheckSum list computed for the file state described by st
+
+        Failures to write (locked or read-only database) are ignored.
+        """
+        with self._lock:
+            if self.disabled:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self._key(file_path), block_size, st.st_size, st.st_mtime_ns,
+                     st.st_ino, b"".join(checksums), time.time())
+                )
+            except sqlite3.Error:
+                self.disabled = True
+
+    def evict(self):
+        """Drop least recently used entries above max_entries"""
+        if self.disabled:
+            return
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "DELETE FROM digests WHERE rowid IN ("
+                    " SELECT rowid FROM digests ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            except sqlite3.Error:
+                pass
+
+    def flush(self):
+        """Record last-used times of cache hits and evict over-limit entries"""
+        if self.disabled:
+            return
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            if touched:
+                try:
+                    with self._conn:
+                        self._conn.execute("BEGIN")
+                        self._conn.executemany(
+                            "UPDATE digests SET last_used = ? WHERE path = ? AND block_size = ?",
+                            [(used, key, block_size) for (key, block_size), used in touched.items()]
+                        )
+                except sqlite3.Error:
+                    pass
+        self.evict()
+
+    def close(self):
+        if self._conn is None:
+            return
+        self.flush()
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Command line interface of auto_build.py (python -m men3_activator)
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from . import colors
+from .builder import ActivatorBuilder
+from .constants import ASYNC_PREFETCH, BASE_DIR, DEPLOY_JOBS, WATCH_DEBOUNCE
+
+
+def main(argv: Optional[List[str]] = None, base_dir: Path = BASE_DIR):
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Fully automated build for LG MEN3 Activator',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python auto_build.py              # Full automation (update + verify)
+  python auto_build.py --update     # Update checksums only
+  python auto_build.py --verify     # Verify checksums only
+  python auto_build.py --verify --verify-mode fast  # Stop at the first bad block
+  python auto_build.py --no-backup  # Without creating backups
+  python auto_build.py --incremental  # Only rewrite changed manifests
+  python auto_build.py --build-index && python auto_build.py --verify-index
+  python auto_build.py --export activator.zip  # Update + archive in one pass
+  python auto_build.py --deploy /media/sdcard  # Verified copy to target media
+  python auto_build.py --diff /old/package /new/package  # Changed files and blocks
+  python auto_build.py --watch --no-backup  # Update manifests on every save
+  python auto_build.py --report-json report.json --profile build.prof
+  python auto_build.py --batch DIR1 DIR2  # Verify several package trees
+  find . -name Meta -printf '%h\\n' | python auto_build.py --batch -
+        """
+    )
+    
+    parser.add_argument('--update', action='store_true',
+                       help='Update checksums only')
+    parser.add_argument('--verify', action='store_true',
+                       help='Verify checksums only')
+    parser.add_argument('--no-backup', action='store_true',
+                       help='Do not create backups')
+    parser.add_argument('--quiet', action='store_true',
+                       help='Minimal output')
+    parser.add_argument('--backup-keep', type=int, metavar='N',
+                       help='Keep only the N newest backups of each file')
+    parser.add_argument('--gc-backups', action='store_true',
+                       help='Apply --backup-keep and remove unreferenced backups, then exit')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Do not use the persistent digest cache')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Rewrite only manifests whose checksums changed')
+    parser.add_argument('--export', type=Path, metavar='ARCHIVE',
+                       help='Update checksums and write Data/, Meta/, common/ to ARCHIVE '
+                            '(.zip, .tar, .tar.gz, .tar.xz, .tar.bz2) reading each payload once')
+    parser.add_argument('--deploy', type=Path, metavar='DIR',
+                       help='Copy Data/, Meta/, common/ to DIR (e.g. SD card) and verify every copy '
+                            f'(--jobs files at once, default {DEPLOY_JOBS})')
+    parser.add_argument('--diff', nargs='+', metavar='ROOT',
+                       help='Compare package trees block by block: --diff OLD [NEW] '
+                            '(NEW defaults to this package); exit code 1 if they differ')
+    parser.add_argument('--build-index', action='store_true',
+                       help='Verify, then write a binary index of Data/ and Meta/ for --verify-index')
+    parser.add_argument('--verify-index', action='store_true',
+                       help='Verify against the index, rehashing only files whose size/mtime changed')
+    parser.add_argument('--index-file', type=Path, metavar='PATH',
+                       help='Index location (default: .verify_index in the package)')
+    parser.add_argument('--watch', action='store_true',
+                       help='Watch Data/ and Meta/ and update checksums after every change')
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE, metavar='SECONDS',
+                       help=f'--watch: wait for SECONDS of quiet before updating (default: {WATCH_DEBOUNCE})')
+    parser.add_argument('--poll', action='store_true',
+                       help='--watch: poll for changes instead of using inotify')
+    parser.add_argument('--jobs', type=int, metavar='N',
+                       help=f'Verify up to N files in parallel (default: 1, --deploy: {DEPLOY_JOBS})')
+    parser.add_argument('--verify-mode', choices=['all', 'fast'], default='all',
+                       help='all: hash everything and report every difference; '
+                            'fast: check sizes first and stop at the first bad block/file')
+    parser.add_argument('--async-io', action='store_true',
+                       help='Overlap sequential reads and hashing (SD/USB media)')
+    parser.add_argument('--prefetch', type=int, default=ASYNC_PREFETCH, metavar='N',
+                       help=f'Blocks read ahead per file with --async-io (default: {ASYNC_PREFETCH})')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                       help='Console log format: colored text or JSON lines')
+    parser.add_argument('--log-file', type=Path, metavar='PATH',
+                       help='Also write JSON-lines log to PATH')
+    parser.add_argument('--report-json', type=Path, metavar='PATH',
+                       help='Write the build report with per-phase timings and I/O counters as JSON')
+    parser.add_argument('--profile', type=Path, metavar='PATH',
+                       help='Profile the run with cProfile and save the stats to PATH')
+    parser.add_argument('--trace-memory', action='store_true',
+                       help='Trace allocations with tracemalloc (peak and top sites in the report)')
+    parser.add_argument('--batch', nargs='+', metavar='ROOT',
+                       help="Verify several package trees in one process ('-' reads roots from stdin)")
+    parser.add_argument('--serve', type=Path, metavar='SOCKET',
+                       help='Run a verification daemon on a Unix socket')
+    parser.add_argument('--cache-file', type=Path, metavar='PATH',
+                       help='Shared digest cache for --batch/--serve')
+    
+    args = parser.parse_args(argv)
+    
+    if args.batch or args.serve:
+        sys.exit(run_batch(args))
+    
+    builder = ActivatorBuilder(
+        create_backup=not args.no_backup,
+        verbose=not args.quiet,
+        use_cache=not args.no_cache,
+        incremental=args.incremental,
+        verify_workers=args.jobs or 1,
+        log_format=args.log_format,
+        log_file=args.log_file,
+        backup_keep=args.backup_keep,
+        base_dir=base_dir,
+        async_io=args.async_io,
+        prefetch=args.prefetch,
+        verify_mode=args.verify_mode
+    )
+    
+    hooks = None
+    if args.profile or args.trace_memory:
+        from .metrics import ProfileHooks
+        hooks = ProfileHooks(args.profile, args.trace_memory)
+        hooks.start()
+    
+    try:
+        if args.gc_backups:
+            success = builder.gc_backups(args.backup_keep)
+            sys.exit(0 if success else 1)
+        elif args.export:
+            success = builder.check_files_exist() and builder.export_archive(args.export)
+            sys.exit(0 if success else 1)
+        elif args.deploy:
+            success = builder.check_files_exist()
+            if success:
+                success, results = builder.deploy(args.deploy, args.jobs)
+            sys.exit(0 if success else 1)
+        elif args.diff:
+            if len(args.diff) > 2:
+                parser.error("--diff takes OLD [NEW]")
+            new_root = Path(args.diff[1]) if len(args.diff) > 1 else None
+            identical, report = builder.diff_trees(Path(args.diff[0]), new_root)
+            if args.log_format == "json":
+                # After the log lines, so the report is always the last line
+                builder.flush_log()
+                print(json.dumps(report, ensure_ascii=False), flush=True)
+            sys.exit(0 if identical else 1)
+        elif args.build_index:
+            builder.check_files_exist()
+            success = builder.build_index(args.index_file)
+            sys.exit(0 if success else 1)
+        elif args.verify_index:
+            verify_ok, results = builder.verify_index(args.index_file)
+            sys.exit(0 if verify_ok else 1)
+        elif args.watch:
+            from .watch import watch_tree
+            success = watch_tree(builder, debounce=args.debounce, poll=args.poll)
+            sys.exit(0 if success else 1)
+        elif args.verify:
+            # Verify only
+            builder.check_files_exist()
+            verify_ok, results = builder.verify_checksums()
+            sys.exit(0 if verify_ok else 1)
+        elif args.update:
+            # Update only
+            builder.check_files_exist()
+            success = builder.update_checksums()
+            sys.exit(0 if success else 1)
+        else:
+            # Full automation
+            success = builder.run_full_build()
+            sys.exit(0 if success else 1)
+            
+    except KeyboardInterrupt:
+        builder.console(f"\n{colors.RED}Interrupted by user{colors.RESET}")
+        sys.exit(1)
+    except Exception as e:
+        builder.console(f"{colors.RED}Critical error: {e}{colors.RESET}")
+        import traceback
+        builder.console(traceback.format_exc())
+        sys.exit(1)
+    finally:
+        finish_report(builder, args, hooks)
+        builder.close()
+
+
+def finish_report(builder: ActivatorBuilder, args: argparse.Namespace, hooks) -> None:
+    """Stop profiling hooks and write --report-json"""
+    profiling = hooks.stop() if hooks is not None else {}
+    if "profile" in profiling:
+        builder.console(f"Profile saved to {profiling['profile']['path']}")
+    if "memory" in profiling:
+        builder.console(f"Peak traced memory: {profiling['memory']['peak_bytes']} bytes")
+    if args.report_json:
+        try:
+            data = builder.report_data()
+            data.update(profiling)
+            args.report_json.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n",
+                                        encoding='utf-8')
+        except OSError as e:
+            builder.console(f"{colors.RED}Failed to write {args.report_json}: {e}{colors.RESET}")
+
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """--batch / --serve: verify many trees with shared pools and cache"""
+    from .batch import BatchVerifier, default_cache_path, read_roots, serve
+    
+    cache_path = None if args.no_cache else (args.cache_file or default_cache_path())
+    with BatchVerifier(cache_path, jobs=args.jobs or 1, verify_mode=args.verify_mode) as verifier:
+        if args.serve:
+            try:
+                serve(args.serve, verifier)
+            except FileExistsError as e:
+                print(f"{colors.RED}Cannot listen on {args.serve}: {e.strerror}{colors.RESET}")
+                return 1
+            return 0
+        
+        results = verifier.verify_all(read_roots(args.batch))
+        for result in results:
+            if args.log_format == "json":
+                print(json.dumps(result, ensure_ascii=False))
+            elif result["ok"]:
+                print(f"{colors.GREEN}✅ {result['root']}{colors.RESET}")
+            else:
+                print(f"{colors.RED}❌ {result['root']}{colors.RESET}")
+                for error in result["errors"]:
+                    print(f"{colors.RED}   {error}{colors.RESET}")
+        return 0 if all(result["ok"] for result in results) else 1
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+ANSI colors for console output (Windows and Linux support)
+
+colorama is only imported the first time a color is looked up (or by
+init()), so code that never prints colored output does not pay for it.
+Without colorama all colors are empty strings.
+"""
+
+NAMES = ("GREEN", "YELLOW", "RED", "CYAN", "BLUE", "RESET", "BOLD")
+_CODES = {
+    "GREEN": '\033[92m',
+    "YELLOW": '\033[93m',
+    "RED": '\033[91m',
+    "CYAN": '\033[96m',
+    "BLUE": '\033[94m',
+    "RESET": '\033[0m',
+    "BOLD": '\033[1m',
+}
+
+
+def _load():
+    if "RESET" in globals():
+        return
+    try:
+        import colorama
+        colorama.init()
+        palette = _CODES
+    except ImportError:
+        palette = dict.fromkeys(NAMES, '')
+    globals().update(palette)
+
+
+def init():
+    """Load colors now; colorama.init() wraps sys.stdout, so this must run
+    before anything keeps a reference to the stream"""
+    _load()
+
+
+def __getattr__(name: str) -> str:
+    if name in NAMES:
+        _load()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
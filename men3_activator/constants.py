@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Package layout and tuning constants for LG MEN3 Activator tools
+"""
+
+import os
+from pathlib import Path
+
+# Default package tree: the directory containing this package
+BASE_DIR = Path(__file__).resolve().parent.parent
+META_DIR_NAME = "Meta"
+DATA_DIR_NAME = "Data"
+COMMON_DIR_NAME = "common"
+ROOT_MANIFEST = "multi_activator.mnf"
+BACKUP_DIR_NAME = ".backups"
+BACKUP_INDEX_NAME = "index.jsonl"
+CACHE_FILE_NAME = ".digest_cache.db"
+INDEX_FILE_NAME = ".verify_index"
+
+CHECKSUM_SIZE = 524288
+HASH_WORKERS = os.cpu_count() or 1
+READ_BUFFER_SIZE = 1024 * 1024
+ASYNC_PREFETCH = 4
+DEPLOY_JOBS = 4
+CACHE_MAX_ENTRIES = 10000
+CACHE_BUSY_TIMEOUT = 1.0
+LOG_RETENTION = 1000
+WATCH_DEBOUNCE = 0.2
+WATCH_POLL_INTERVAL = 1.0
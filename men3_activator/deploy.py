@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Verified copy of the package tree to target media (SD card, USB stick)
+
+Each file is copied in the kernel (copy_file_range, then sendfile, then a
+userspace buffer), flushed, dropped from the page cache and read back
+block by block against its expected CheckSum list before it is renamed
+into place. Several files are in flight at once, so copying one file
+overlaps with reading back another.
+"""
+
+import os
+import errno
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+from .constants import READ_BUFFER_SIZE
+from .hashing import find_mismatched_block
+from .writer import fsync_path
+
+# Largest single copy_file_range/sendfile request
+COPY_CHUNK = 1 << 30
+# errno values that mean "this copy method does not work here, try the next"
+_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP,
+                errno.ENOTSUP, errno.EBADF, errno.ETXTBSY}
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, size: int) -> int:
+    while offset < size:
+        n = os.copy_file_range(src_fd, dst_fd, min(COPY_CHUNK, size - offset), offset, offset)
+        if n == 0:
+            break
+        offset += n
+    return offset
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, size: int) -> int:
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    while offset < size:
+        n = os.sendfile(dst_fd, src_fd, offset, min(COPY_CHUNK, size - offset))
+        if n == 0:
+            break
+        offset += n
+    return offset
+
+
+def _userspace(src_fd: int, dst_fd: int, offset: int, size: int) -> int:
+    buf = bytearray(READ_BUFFER_SIZE)
+    view = memoryview(buf)
+    while offset < size:
+        n = os.preadv(src_fd, [view], offset) if hasattr(os, "preadv") else \
+            _pread_into(src_fd, view, offset)
+        if n == 0:
+            break
+        written = 0
+        while written < n:
+            written += os.pwrite(dst_fd, view[written:n], offset + written)
+        offset += n
+    return offset
+
+
+def _pread_into(fd: int, view: memoryview, offset: int) -> int:
+    data = os.pread(fd, len(view), offset)
+    view[:len(data)] = data
+    return len(data)
+
+
+def copy_file(src: Path, dst: Path) -> str:
+    """Copy src to dst (created/truncated); returns the method that did the work"""
+    methods = []
+    if hasattr(os, "copy_file_range"):
+        methods.append(("copy_file_range", _copy_file_range))
+    if hasattr(os, "sendfile") and hasattr(os, "pwrite"):
+        methods.append(("sendfile", _sendfile))
+    if hasattr(os, "pwrite"):
+        methods.append(("userspace", _userspace))
+    else:
+        shutil.copyfile(src, dst)
+        return "shutil"
+
+    src_fd = os.open(str(src), os.O_RDONLY)
+    try:
+        dst_fd = os.open(str(dst), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            size = os.fstat(src_fd).st_size
+            copied = 0
+            for name, method in methods:
+                try:
+                    copied = method(src_fd, dst_fd, copied, size)
+                except OSError as e:
+                    # Falling back is only safe while the method is unsupported
+                    if e.errno not in _UNSUPPORTED:
+                        raise
+                    continue
+                if copied >= size:
+                    return name
+            raise OSError(errno.EIO, f"short copy: {copied} of {size} bytes", str(src))
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+
+def flush_and_drop(file_path: Path):
+    """fsync file_path and evict it from the page cache, so a read-back
+    comes from the medium instead of memory"""
+    fsync_path(file_path)
+    if hasattr(os, "posix_fadvise"):
+        # Pages are clean after the fsync, so the kernel can drop them
+        fd = os.open(str(file_path), os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def deploy_file(src: Path, dst: Path, expected: List[bytes], block_size: int,
+                hash_workers: Optional[int] = None, expected_size: Optional[int] = None) -> str:
+    """Copy, read back and verify one file; returns the copy method
+
+    The copy must have expected_size bytes (the manifest Length, if given)
+    and exactly one block per expected digest. Raises ValueError on a
+    verification mismatch (dst is left untouched).
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(dst.parent), prefix=f".{dst.name}.", suffix=".tmp")
+    os.close(fd)
+    tmp = Path(tmp_name)
+    try:
+        method = copy_file(src, tmp)
+        shutil.copystat(src, tmp)
+        flush_and_drop(tmp)
+        size = tmp.stat().st_size
+        if expected_size is not None and size != expected_size:
+            raise ValueError(f"size {size} != Length {expected_size} after copy")
+        blocks = max(1, -(-size // block_size))
+        if blocks != len(expected):
+            raise ValueError(f"{blocks} block(s) of {block_size} bytes after copy, "
+                             f"CheckSum lists {len(expected)}")
+        bad = find_mismatched_block(tmp, expected, block_size, hash_workers)
+        if bad is not None:
+            raise ValueError(f"block {bad} differs after copy")
+        os.replace(tmp, dst)
+        return method
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Block-level comparison of two package trees
+
+Both trees are walked through their manifest graphs (manifests,
+installer.txt files and the payloads they checksum). Files are compared by
+size and CheckSumSize block digests; digests come from the digest cache
+whenever a file's stat identity is unchanged, so comparing a large tree
+with a small delta only hashes the files that actually changed.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .constants import CHECKSUM_SIZE
+from .manifest import ManifestGraph
+
+
+def graph_files(graph: ManifestGraph) -> Dict[str, Tuple[Path, int]]:
+    """Tree-relative path -> (path, CheckSumSize) of every file in the graph"""
+    files: Dict[str, Tuple[Path, int]] = {}
+    for node in graph.order:
+        for ref in node.checksums:
+            files.setdefault(graph.relative(ref.target), (ref.target, ref.block_size))
+    for path in graph.nodes:
+        files.setdefault(graph.relative(path), (path, CHECKSUM_SIZE))
+    return files
+
+
+def block_ranges(old: List[bytes], new: List[bytes]) -> List[Tuple[int, int]]:
+    """[start, end) runs of block indices whose digests differ (or exist on one side only)"""
+    ranges: List[Tuple[int, int]] = []
+    start = None
+    for i in range(max(len(old), len(new))):
+        differs = i >= len(old) or i >= len(new) or old[i] != new[i]
+        if differs and start is None:
+            start = i
+        elif not differs and start is not None:
+            ranges.append((start, i))
+            start = None
+    if start is not None:
+        ranges.append((start, max(len(old), len(new))))
+    return ranges
+
+
+def modified_entry(old_size: int, new_size: int, block_size: int,
+                   old: List[bytes], new: List[bytes]) -> Dict[str, Any]:
+    """JSON description of a modified file"""
+    ranges = block_ranges(old, new)
+    size = max(old_size, new_size)
+    return {
+        "old_size": old_size,
+        "new_size": new_size,
+        "block_size": block_size,
+        "blocks": [[start, end] for start, end in ranges],
+        "bytes": [[start * block_size, min(end * block_size, size)] for start, end in ranges],
+    }
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming tar/zip export of the package tree
+
+ArchiveWriter copies files into the archive in fixed-size chunks and can
+feed the same chunks into BlockHashers, so a payload is read once for both
+its CheckSum list and the archive. The archive is built in a temp file
+and only renamed into place by commit().
+"""
+
+import io
+import os
+import stat
+import time
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .constants import COMMON_DIR_NAME, DATA_DIR_NAME, META_DIR_NAME, READ_BUFFER_SIZE
+from .hashing import BlockHasher
+from .writer import fsync_path
+
+# Suffix -> tarfile mode ("zip" for zip archives)
+ARCHIVE_MODES = {
+    ".zip": "zip",
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tar.xz": "w:xz",
+}
+EXPORT_DIRS = (DATA_DIR_NAME, META_DIR_NAME, COMMON_DIR_NAME)
+
+
+def archive_mode(archive_path: Path) -> str:
+    name = archive_path.name.lower()
+    for suffix in sorted(ARCHIVE_MODES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return ARCHIVE_MODES[suffix]
+    raise ValueError(f"Unsupported archive type: {archive_path.name} "
+                     f"(use {', '.join(ARCHIVE_MODES)})")
+
+
+def iter_export_files(base_dir: Path) -> Iterator[Path]:
+    """Every file under Data/, Meta/ and common/, in sorted order"""
+    for name in EXPORT_DIRS:
+        for current, subdirs, files in os.walk(base_dir / name):
+            subdirs.sort()
+            for file_name in sorted(files):
+                yield Path(current) / file_name
+
+
+class _HashingReader(io.RawIOBase):
+    """Read at most `size` bytes from f, feeding them into hashers"""
+
+    def __init__(self, f: BinaryIO, hashers: Iterable[BlockHasher], size: int):
+        super().__init__()
+        self._f = f
+        self._hashers = list(hashers)
+        self.remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0 or n > self.remaining:
+            n = self.remaining
+        data = self._f.read(n)
+        self.remaining -= len(data)
+        for hasher in self._hashers:
+            hasher.update(data)
+        return data
+
+
+class ArchiveWriter:
+    """tar or zip archive (chosen by suffix), written atomically"""
+
+    def __init__(self, archive_path: Path, chunk_size: int = READ_BUFFER_SIZE):
+        self.archive_path = archive_path
+        self.chunk_size = chunk_size
+        self.mode = archive_mode(archive_path)
+        fd, tmp_name = tempfile.mkstemp(dir=str(archive_path.parent),
+                                        prefix=f".{archive_path.name}.", suffix=".tmp")
+        os.close(fd)
+        self.tmp_path = Path(tmp_name)
+        self.committed = False
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        try:
+            if self.mode == "zip":
+                self._zip = zipfile.ZipFile(tmp_name, 'w', compression=zipfile.ZIP_DEFLATED,
+                                            allowZip64=True)
+            else:
+                self._tar = tarfile.open(tmp_name, self.mode, format=tarfile.PAX_FORMAT)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def add_file(self, file_path: Path, arcname: str,
+                 block_sizes: Iterable[int] = ()) -> Tuple[int, Dict[int, List[bytes]]]:
+        """Stream file into the archive; returns (size, {CheckSumSize: CheckSum list})"""
+        hashers = {block_size: BlockHasher(block_size) for block_size in block_sizes}
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            source = _HashingReader(f, hashers.values(), st.st_size)
+            if self._tar is not None:
+                info = tarfile.TarInfo(arcname)
+                info.size = st.st_size
+                info.mtime = int(st.st_mtime)
+                info.mode = stat.S_IMODE(st.st_mode)
+                self._tar.addfile(info, source)
+            else:
+                with self._zip.open(self._zip_info(arcname, st.st_mtime, st.st_mode), 'w',
+                                    force_zip64=True) as out:
+                    while True:
+                        chunk = source.read(self.chunk_size)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+        if source.remaining:
+            raise OSError(f"{arcname} shrank while being exported")
+        return st.st_size, {size: hasher.digests() for size, hasher in hashers.items()}
+
+    def add_bytes(self, arcname: str, data: bytes, mtime: Optional[float] = None,
+                  mode: int = 0o644):
+        """Add in-memory content (rendered manifests)"""
+        mtime = time.time() if mtime is None else mtime
+        if self._tar is not None:
+            info = tarfile.TarInfo(arcname)
+            info.size = len(data)
+            info.mtime = int(mtime)
+            info.mode = mode
+            self._tar.addfile(info, io.BytesIO(data))
+        else:
+            self._zip.writestr(self._zip_info(arcname, mtime, mode), data)
+
+    @staticmethod
+    def _zip_info(arcname: str, mtime: float, mode: int) -> zipfile.ZipInfo:
+        # Zip timestamps start in 1980
+        info = zipfile.ZipInfo(arcname, date_time=max(time.localtime(mtime)[:6],
+                                                      (1980, 1, 1, 0, 0, 0)))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = (stat.S_IFREG | stat.S_IMODE(mode)) << 16
+        return info
+
+    def _close(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def commit(self):
+        """Finish the archive and move it into place"""
+        self._close()
+        fsync_path(self.tmp_path)
+        os.chmod(self.tmp_path, 0o644)
+        os.replace(self.tmp_path, self.archive_path)
+        self.committed = True
+
+    def abort(self):
+        try:
+            self._close()
+        finally:
+            if self.tmp_path.exists():
+                self.tmp_path.unlink()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc):
+        # Left without commit (error or early return): no partial archive
+        if not self.committed:
+            self.abort()
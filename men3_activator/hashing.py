@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+SHA256 engine: CheckSumSize block digests, zero-copy file reads
+
+CheckSum lists are lists of raw 32-byte digests; they are only turned
+into hex when a manifest is written or a digest is reported.
+"""
+
+import os
+import mmap
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+
+from .backends import sha256
+from .constants import CHECKSUM_SIZE, HASH_WORKERS, READ_BUFFER_SIZE
+
+if TYPE_CHECKING:
+    from .cache import DigestCache
+    from .metrics import IOStats
+
+_hash_pools: Dict[int, ThreadPoolExecutor] = {}
+_hash_pools_lock = threading.Lock()
+_read_buffers = threading.local()
+
+
+def get_hash_pool(workers: Optional[int] = None) -> ThreadPoolExecutor:
+    """Return shared thread pool for block hashing (hashlib releases the GIL)"""
+    workers = workers or HASH_WORKERS
+    with _hash_pools_lock:
+        pool = _hash_pools.get(workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sha256")
+            _hash_pools[workers] = pool
+        return pool
+
+
+class FileReader:
+    """Zero-copy read access to a file
+
+    Maps the file with mmap and hands out memoryview slices that can be fed
+    straight into a hasher. Files or filesystems that cannot be mapped
+    (empty files, pipes, some network/FUSE mounts) fall back to buffered
+    readinto() into reusable per-thread buffers.
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._lock = threading.Lock()
+        try:
+            if self.size > 0:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(self._map, "madvise"):
+                    self._map.madvise(mmap.MADV_SEQUENTIAL)
+                self._view = memoryview(self._map)
+        except (OSError, ValueError):
+            self._map = None
+
+    @property
+    def mapped(self) -> bool:
+        return self._view is not None
+
+    @staticmethod
+    def _buffer(size: int) -> bytearray:
+        buf = getattr(_read_buffers, "buf", None)
+        if buf is None or len(buf) < size:
+            buf = _read_buffers.buf = bytearray(size)
+        return buf
+
+    def _readinto(self, buf: memoryview, offset: int) -> int:
+        """Fill buf from offset, positional where the OS supports it"""
+        if hasattr(os, "preadv"):
+            return os.preadv(self._file.fileno(), [buf], offset)
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.readinto(buf)
+
+    def update_block(self, hasher, offset: int, size: int):
+        """Feed bytes [offset, offset + size) of the file into hasher"""
+        if self._view is not None:
+            with self._view[offset:offset + size] as block:
+                hasher.update(block)
+            return
+        size = max(0, min(size, self.size - offset))
+        buf = memoryview(self._buffer(size))[:size]
+        filled = 0
+        while filled < size:
+            n = self._readinto(buf[filled:], offset + filled)
+            if not n:
+                break
+            filled += n
+        hasher.update(buf[:filled])
+
+    def iter_chunks(self, chunk_size: int = READ_BUFFER_SIZE):
+        """Yield the file sequentially as memoryview chunks
+
+        Chunks from the fallback path share one buffer and are only valid
+        until the next chunk is requested.
+        """
+        if self._view is not None:
+            for offset in range(0, self.size, chunk_size):
+                with self._view[offset:offset + chunk_size] as chunk:
+                    yield chunk
+            return
+        buf = bytearray(chunk_size)
+        view = memoryview(buf)
+        self._file.seek(0)
+        while True:
+            n = self._file.readinto(buf)
+            if not n:
+                break
+            yield view[:n]
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "FileReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BlockHasher:
+    """CheckSum list of a stream: SHA256 of every block_size bytes fed in
+
+    For data that is already being read for another purpose (archiving,
+    copying), so it is hashed without a second read; memory use is one
+    hasher regardless of the stream length.
+    """
+
+    def __init__(self, block_size: int = CHECKSUM_SIZE):
+        if block_size <= 0:
+            raise ValueError(f"Invalid CheckSumSize: {block_size}")
+        self.block_size = block_size
+        self._hasher = sha256()
+        self._filled = 0
+        self._digests: List[bytes] = []
+
+    def update(self, data: bytes):
+        view = memoryview(data)
+        while len(view):
+            take = min(len(view), self.block_size - self._filled)
+            self._hasher.update(view[:take])
+            self._filled += take
+            view = view[take:]
+            if self._filled == self.block_size:
+                self._digests.append(self._hasher.digest())
+                self._hasher = sha256()
+                self._filled = 0
+
+    def digests(self) -> List[bytes]:
+        """CheckSum list of everything fed so far (same rules as for files)"""
+        if self._filled or not self._digests:
+            return self._digests + [self._hasher.digest()]
+        return list(self._digests)
+
+
+def calculate_sha256(file_path: Path) -> str:
+    """Calculate SHA256 hash of whole file"""
+    hasher = sha256()
+    with FileReader(file_path) as reader:
+        for chunk in reader.iter_chunks():
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def calculate_block_checksums(file_path: Path, block_size: int = CHECKSUM_SIZE,
+                              workers: Optional[int] = None) -> List[bytes]:
+    """Calculate SHA256 of every CheckSumSize block of file, in file order
+
+    Files not larger than one block yield a single digest equal to the
+    SHA256 of the whole file, so the result matches the `CheckSum` list
+    format used by installer.txt and .mnf files.
+    """
+    if block_size <= 0:
+        raise ValueError(f"Invalid CheckSumSize: {block_size}")
+
+    with FileReader(file_path) as reader:
+        def hash_block(offset: int) -> bytes:
+            hasher = sha256()
+            reader.update_block(hasher, offset, block_size)
+            return hasher.digest()
+
+        if reader.size <= block_size:
+            return [hash_block(0)]
+
+        offsets = range(0, reader.size, block_size)
+        return list(get_hash_pool(workers).map(hash_block, offsets))
+
+
+def find_mismatched_block(file_path: Path, expected: List[bytes], block_size: int = CHECKSUM_SIZE,
+                          workers: Optional[int] = None) -> Optional[int]:
+    """Index of the first CheckSumSize block whose digest differs from
+    `expected` (raw 32-byte digests), or None if the whole list matches
+
+    Blocks are hashed on the shared pool in file order, at most one block
+    per worker ahead of the comparison, and the first mismatch cancels the
+    rest: a corrupt file costs about one block read instead of a full hash.
+    """
+    if block_size <= 0:
+        raise ValueError(f"Invalid CheckSumSize: {block_size}")
+
+    with FileReader(file_path) as reader:
+        count = max(1, -(-reader.size // block_size))
+
+        def hash_block(index: int) -> bytes:
+            hasher = sha256()
+            reader.update_block(hasher, index * block_size, block_size)
+            return hasher.digest()
+
+        limit = min(count, len(expected))
+        if count == 1:
+            if not expected or hash_block(0) != expected[0]:
+                return 0
+            # A one-block file against a longer list is short
+            return None if len(expected) == 1 else 1
+
+        pool = get_hash_pool(workers)
+        window = max(1, workers or HASH_WORKERS)
+        pending: Deque[Tuple[int, Future]] = deque()
+        try:
+            for index in range(limit):
+                pending.append((index, pool.submit(hash_block, index)))
+                if len(pending) >= window:
+                    done, digest = pending.popleft()
+                    if digest.result() != expected[done]:
+                        return done
+            while pending:
+                done, digest = pending.popleft()
+                if digest.result() != expected[done]:
+                    return done
+        finally:
+            # The reader is closed on return: wait for blocks already running
+            for _, digest in pending:
+                digest.cancel()
+            wait([digest for _, digest in pending])
+        # Every compared block matched; a different block count still differs
+        return None if count == len(expected) else limit
+
+
+def calculate_buffer_checksums(data: bytes, block_size: int = CHECKSUM_SIZE) -> List[bytes]:
+    """CheckSum list of in-memory content (same block rules as for files)"""
+    view = memoryview(data)
+    if len(view) <= block_size:
+        return [sha256(view).digest()]
+    return [sha256(view[offset:offset + block_size]).digest()
+            for offset in range(0, len(view), block_size)]
+
+
+def calculate_block_checksums_cached(file_path: Path, block_size: int = CHECKSUM_SIZE,
+                                     workers: Optional[int] = None,
+                                     cache: Optional["DigestCache"] = None,
+                                     stats: Optional["IOStats"] = None) -> List[bytes]:
+    """calculate_block_checksums() that reuses and fills a DigestCache
+
+    Reads, hashing time and cache hits are counted in `stats` if given.
+    """
+    # Stat before hashing so a concurrent edit invalidates the entry
+    st = os.stat(file_path)
+    if cache is not None:
+        checksums = cache.get(file_path, block_size, st)
+        if checksums is not None:
+            if stats is not None:
+                stats.add(file_path, cache_hits=1)
+            return checksums
+
+    start = time.perf_counter()
+    checksums = calculate_block_checksums(file_path, block_size, workers)
+    if stats is not None:
+        stats.record_read(file_path, st.st_size, time.perf_counter() - start)
+    if cache is not None:
+        cache.put(file_path, block_size, st, checksums)
+        if stats is not None:
+            stats.add(cache_misses=1)
+    return checksums
+
+
+def content_digest(checksums: List[bytes]) -> str:
+    """Single content key (hex) for a CheckSum list
+
+    A one-block list already is the SHA256 of the whole file; longer lists
+    are reduced to the SHA256 of their concatenated digests.
+    """
+    if len(checksums) == 1:
+        return checksums[0].hex()
+    return sha256(b"".join(checksums)).hexdigest()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Binary verification index of the Data/ and Meta/ trees
+
+Layout (little-endian), written atomically next to the package:
+
+    header   magic "MEN3IDX\\0", version, entry count, path table size,
+             digest count
+    entries  one fixed-size record per file: path offset/length, size,
+             mtime_ns, inode, CheckSumSize, first digest, digest count
+    paths    UTF-8 tree-relative paths ('/' separated)
+    digests  32-byte raw SHA256 block digests
+
+The reader maps the file and decodes records on demand, so checking an
+unchanged tree costs one stat() per file and no reads of file contents.
+"""
+
+import os
+import mmap
+import struct
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Sequence
+
+from .constants import DATA_DIR_NAME, META_DIR_NAME
+
+INDEX_MAGIC = b"MEN3IDX\0"
+INDEX_VERSION = 1
+DIGEST_SIZE = 32
+_HEADER = struct.Struct("<8sHHIQQ")
+_ENTRY = struct.Struct("<IHHQqQIQI")
+
+
+def iter_tree_files(base_dir: Path) -> Iterator[Path]:
+    """Every file under Data/ and Meta/, in sorted order"""
+    for name in (DATA_DIR_NAME, META_DIR_NAME):
+        for current, subdirs, files in os.walk(base_dir / name):
+            subdirs.sort()
+            for file_name in sorted(files):
+                yield Path(current) / file_name
+
+
+class IndexEntry:
+    """One indexed file: stat identity and CheckSum list"""
+
+    def __init__(self, path: str, size: int, mtime_ns: int, inode: int,
+                 block_size: int, checksums: List[bytes]):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+        self.block_size = block_size
+        self.checksums = checksums
+
+    def matches(self, st: os.stat_result) -> bool:
+        """True if st still describes the indexed file"""
+        return (st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+                and st.st_ino == self.inode)
+
+
+def write_index(index_path: Path, entries: Sequence[IndexEntry]):
+    """Write entries to index_path (temp file + rename)"""
+    paths = bytearray()
+    digests = bytearray()
+    records = bytearray()
+    digest_count = 0
+    for entry in entries:
+        encoded = entry.path.encode('utf-8')
+        records += _ENTRY.pack(len(paths), len(encoded), 0, entry.size, entry.mtime_ns,
+                               entry.inode, entry.block_size, digest_count, len(entry.checksums))
+        paths += encoded
+        for checksum in entry.checksums:
+            digests += checksum
+        digest_count += len(entry.checksums)
+    header = _HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, len(entries), len(paths), digest_count)
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{index_path.name}.", dir=str(index_path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(records)
+            f.write(paths)
+            f.write(digests)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, index_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class IndexReader:
+    """Memory-mapped, read-only view of an index file"""
+
+    def __init__(self, index_path: Path):
+        with open(index_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._map) < _HEADER.size:
+                raise ValueError(f"{index_path.name}: truncated index")
+            magic, version, _, self.count, paths_size, digest_count = _HEADER.unpack_from(self._map, 0)
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"{index_path.name}: not a verification index")
+            if version != INDEX_VERSION:
+                raise ValueError(f"{index_path.name}: unsupported index version {version}")
+            self._paths = _HEADER.size + self.count * _ENTRY.size
+            self._digests = self._paths + paths_size
+            if len(self._map) != self._digests + digest_count * DIGEST_SIZE:
+                raise ValueError(f"{index_path.name}: truncated index")
+        except Exception:
+            self._map.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.count
+
+    def entry(self, i: int) -> IndexEntry:
+        (path_offset, path_len, _, size, mtime_ns, inode, block_size,
+         first, digest_count) = _ENTRY.unpack_from(self._map, _HEADER.size + i * _ENTRY.size)
+        start = self._paths + path_offset
+        path = self._map[start:start + path_len].decode('utf-8')
+        start = self._digests + first * DIGEST_SIZE
+        checksums = [self._map[offset:offset + DIGEST_SIZE]
+                     for offset in range(start, start + digest_count * DIGEST_SIZE, DIGEST_SIZE)]
+        return IndexEntry(path, size, mtime_ns, inode, block_size, checksums)
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        for i in range(self.count):
+            yield self.entry(i)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self) -> "IndexReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
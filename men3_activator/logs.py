@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Log record formatting for ActivatorBuilder
+"""
+
+import json
+import logging
+from datetime import datetime
+
+from . import colors
+
+# Builder message levels -> (logging level, color names, icon)
+LOG_LEVELS = {
+    "error": (logging.ERROR, ("RED",), "❌ "),
+    "warning": (logging.WARNING, ("YELLOW",), "⚠️  "),
+    "success": (logging.INFO, ("GREEN",), "✅ "),
+    "info": (logging.INFO, ("CYAN",), "ℹ️  "),
+    "step": (logging.INFO, ("BOLD", "BLUE"), "📋 "),
+}
+RAW_LEVEL = "raw"
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Colored `[HH:MM:SS] icon message` lines (formatted on the writer thread)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        level = getattr(record, "activator_level", "info")
+        if level == RAW_LEVEL:
+            return record.getMessage()
+        prefix = f"[{self.formatTime(record, '%H:%M:%S')}]"
+        if level not in LOG_LEVELS:
+            return f"{prefix} {record.getMessage()}"
+        _, color_names, icon = LOG_LEVELS[level]
+        color = "".join(getattr(colors, name) for name in color_names)
+        return f"{color}{prefix} {icon}{record.getMessage()}{colors.RESET}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, message"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": getattr(record, "activator_level", "info"),
+            "message": record.getMessage(),
+        }, ensure_ascii=False)
+
+
+def skip_raw(record: logging.LogRecord) -> bool:
+    """Filter out console-only lines (banners, report) from structured logs"""
+    return getattr(record, "activator_level", None) != RAW_LEVEL
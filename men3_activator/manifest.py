@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Manifest graph: multi_activator.mnf -> ... -> installer.txt -> payload
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constants import CHECKSUM_SIZE, DATA_DIR_NAME, META_DIR_NAME, ROOT_MANIFEST
+
+HEX_DIGEST_LENGTH = 64
+
+
+class SchemaError(ValueError):
+    """Manifest content does not have the structure the tools rely on"""
+
+
+def _field(obj: Dict, key: str, types: Tuple[type, ...], where: str, required: bool = False) -> Any:
+    """obj[key] checked against types (bool is never accepted as int)"""
+    if key not in obj:
+        if required:
+            raise SchemaError(f"{where}: '{key}' is required")
+        return None
+    value = obj[key]
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        expected = " or ".join(t.__name__ for t in types)
+        raise SchemaError(f"{where}: '{key}' must be {expected}, got {type(value).__name__}")
+    return value
+
+
+def _objects(data: Dict, key: str, where: str = "") -> List[Dict]:
+    """List of JSON objects under key (empty if absent)"""
+    items = _field(data, key, (list,), where or "manifest") or []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise SchemaError(f"{key}[{i}] must be an object")
+    return items
+
+
+def _digests(value: Optional[List], where: str) -> List[bytes]:
+    """CheckSum list of 64-char hex strings -> raw 32-byte digests"""
+    digests: List[bytes] = []
+    for i, digest in enumerate(value or []):
+        if not isinstance(digest, str) or len(digest) != HEX_DIGEST_LENGTH:
+            raise SchemaError(f"{where}: CheckSum[{i}] is not a SHA256 hex digest")
+        try:
+            digests.append(bytes.fromhex(digest))
+        except ValueError:
+            raise SchemaError(f"{where}: CheckSum[{i}] is not a SHA256 hex digest") from None
+    return digests
+
+
+class ChecksumEntry:
+    """Length/CheckSumSize/CheckSum of a Scripts[] or HWIndex[] entry
+
+    Digests are kept as raw 32-byte values and only hex-encoded when a
+    manifest is written or a mismatch is reported.
+    """
+
+    __slots__ = ('length', 'checksum_size', 'checksum', 'extra_files')
+
+    def __init__(self, obj: Dict, where: str):
+        self.length: Optional[int] = _field(obj, 'Length', (int,), where)
+        self.checksum_size: Optional[int] = _field(obj, 'CheckSumSize', (int,), where)
+        if self.checksum_size is not None and self.checksum_size <= 0:
+            raise SchemaError(f"{where}: invalid CheckSumSize {self.checksum_size}")
+        self.checksum = _digests(_field(obj, 'CheckSum', (list,), where), where)
+        self.extra_files = 'ExtraFiles' in obj
+
+    @property
+    def block_size(self) -> int:
+        return self.checksum_size or CHECKSUM_SIZE
+
+    def checksum_hex(self) -> List[str]:
+        return [digest.hex() for digest in self.checksum]
+
+    def fields(self) -> Dict[str, Any]:
+        """JSON values of the checksum fields the entry has"""
+        fields: Dict[str, Any] = {}
+        if self.length is not None:
+            fields['Length'] = self.length
+        if self.checksum_size is not None:
+            fields['CheckSumSize'] = self.checksum_size
+        fields['CheckSum'] = self.checksum_hex()
+        return fields
+
+
+class ScriptEntry(ChecksumEntry):
+    """installer.txt Scripts[] entry"""
+
+    __slots__ = ('path',)
+
+    def __init__(self, obj: Dict, where: str):
+        super().__init__(obj, where)
+        self.path: str = _field(obj, 'Path', (str,), where, required=True)
+
+
+class HWIndexEntry(ChecksumEntry):
+    """Module manifest HWIndex[] entry"""
+
+    __slots__ = ('index', 'module_version', 'installer_file')
+
+    def __init__(self, obj: Dict, where: str):
+        super().__init__(obj, where)
+        self.index: Optional[str] = _field(obj, 'Index', (str, int), where)
+        self.module_version: Optional[str] = _field(obj, 'ModuleVersion', (str,), where)
+        self.installer_file: str = _field(obj, 'InstallerFile', (str,), where, required=True)
+
+
+class IncludeEntry:
+    """Includes[] entry: a manifest file or a package directory plus version"""
+
+    __slots__ = ('package_name', 'package_version')
+
+    def __init__(self, obj: Dict, where: str):
+        self.package_name: str = _field(obj, 'PackageName', (str,), where, required=True)
+        self.package_version: Optional[str] = _field(obj, 'PackageVersion', (str,), where)
+
+    def manifest_path(self, manifest_path: Path) -> Path:
+        """Resolve relative to the including manifest
+
+        Entries either name a manifest file directly
+        ("Normal_release_2/main_activator.mnf") or a package directory plus
+        version ("activator_device" + "1.0.0" -> activator_device/1.0.0.mnf).
+        """
+        if self.package_version is not None and not self.package_name.endswith('.mnf'):
+            return manifest_path.parent / self.package_name / f"{self.package_version}.mnf"
+        return manifest_path.parent / self.package_name
+
+
+class UpdateOrderEntry:
+    """UpdateOrder[] entry: install type and groups of device names"""
+
+    __slots__ = ('type', 'devices')
+
+    def __init__(self, obj: Dict, where: str):
+        self.type: Optional[str] = _field(obj, 'Type', (str,), where)
+        devices = _field(obj, 'Devices', (list,), where) or []
+        for i, group in enumerate(devices):
+            if not isinstance(group, list) or not all(isinstance(name, str) for name in group):
+                raise SchemaError(f"{where}: Devices[{i}] must be a list of device names")
+        self.devices: List[List[str]] = devices
+
+
+class ChecksumRef:
+    """CheckSum entry of a manifest (Scripts[i] / HWIndex[i]) and the file it covers"""
+
+    __slots__ = ('entry', 'target', 'path')
+
+    def __init__(self, entry: ChecksumEntry, target: Path, path: Tuple[str, int]):
+        self.entry = entry
+        self.target = target
+        self.path = path
+    
+    @property
+    def label(self) -> str:
+        return f"{self.path[0]}[{self.path[1]}]"
+
+    @property
+    def block_size(self) -> int:
+        return self.entry.block_size
+
+
+class ManifestNode:
+    """Parsed manifest (.mnf) or installer.txt file of the package"""
+
+    __slots__ = ('path', 'kind', 'newline', 'includes', 'checksums',
+                 'include_entries', 'update_order')
+
+    def __init__(self, path: Path, kind: str, newline: str = "\n"):
+        self.path = path
+        self.kind = kind
+        self.newline = newline
+        self.includes: List["ManifestNode"] = []
+        self.checksums: List[ChecksumRef] = []
+        self.include_entries: List[IncludeEntry] = []
+        self.update_order: List[UpdateOrderEntry] = []
+
+
+class ManifestGraph:
+    """Dependency DAG of a package tree
+
+    Starts at Meta/multi_activator.mnf and follows `Includes` down through
+    the main, device and module manifests, then each module's `HWIndex`
+    InstallerFile and its `Scripts`. Every file is parsed exactly once;
+    `order` lists the nodes children-first, so walking it updates payload
+    checksums before the manifests that checksum them.
+    """
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self.meta_dir = base_dir / META_DIR_NAME
+        self.data_dir = base_dir / DATA_DIR_NAME
+        self.nodes: Dict[Path, ManifestNode] = {}
+        self.order: List[ManifestNode] = []
+        self.errors: List[str] = []
+
+    @classmethod
+    def load(cls, base_dir: Path, root: str = ROOT_MANIFEST) -> "ManifestGraph":
+        graph = cls(base_dir)
+        graph._visit(graph.meta_dir / root, "manifest")
+        return graph
+
+    def relative(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return str(path)
+
+    def _visit(self, path: Path, kind: str) -> Optional[ManifestNode]:
+        if path in self.nodes:
+            return self.nodes[path]
+
+        try:
+            raw = path.read_bytes()
+            data = json.loads(raw.decode('utf-8'))
+        except FileNotFoundError:
+            self.errors.append(f"File not found: {self.relative(path)}")
+            return None
+        except (OSError, ValueError) as e:
+            self.errors.append(f"Error reading {self.relative(path)}: {e}")
+            return None
+
+        node = ManifestNode(path, kind, "\r\n" if b"\r\n" in raw else "\n")
+        self.nodes[path] = node
+
+        # Only the typed model is kept; the parsed JSON is dropped after this
+        try:
+            if not isinstance(data, dict):
+                raise SchemaError("top level must be a JSON object")
+            if kind == "installer":
+                for i, obj in enumerate(_objects(data, 'Scripts')):
+                    script = ScriptEntry(obj, f"Scripts[{i}]")
+                    node.checksums.append(
+                        ChecksumRef(script, self.data_dir / script.path, ('Scripts', i)))
+            else:
+                node.include_entries = [IncludeEntry(obj, f"Includes[{i}]")
+                                        for i, obj in enumerate(_objects(data, 'Includes'))]
+                node.update_order = [UpdateOrderEntry(obj, f"UpdateOrder[{i}]")
+                                     for i, obj in enumerate(_objects(data, 'UpdateOrder'))]
+                hw_index = [HWIndexEntry(obj, f"HWIndex[{i}]")
+                            for i, obj in enumerate(_objects(data, 'HWIndex'))]
+                for include in node.include_entries:
+                    child = self._visit(include.manifest_path(path), "manifest")
+                    if child is not None:
+                        node.includes.append(child)
+                for i, entry in enumerate(hw_index):
+                    installer_path = self.data_dir / entry.installer_file
+                    self._visit(installer_path, "installer")
+                    node.checksums.append(ChecksumRef(entry, installer_path, ('HWIndex', i)))
+        except SchemaError as e:
+            self.errors.append(f"Invalid manifest {self.relative(path)}: {e}")
+
+        self.order.append(node)
+        return node
+
+    @property
+    def payloads(self) -> List[Path]:
+        """Files checksummed by installer.txt files (scripts)"""
+        seen: Dict[Path, None] = {}
+        for node in self.order:
+            if node.kind == "installer":
+                for ref in node.checksums:
+                    seen.setdefault(ref.target)
+        return list(seen)
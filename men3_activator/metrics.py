@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Per-phase timing, I/O counters and optional profiling hooks
+
+IOStats is owned by one ActivatorBuilder; hashing code updates it from
+worker threads, so every update takes a lock. Phases record the counter
+deltas between their start and end, plus wall and process CPU time (CPU
+time includes the hash and verify pools).
+"""
+
+import time
+import threading
+import functools
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+
+COUNTERS = ("files_read", "bytes_read", "files_written", "bytes_written",
+            "bytes_hashed", "hash_seconds", "cache_hits", "cache_misses")
+
+
+class IOStats:
+    """Thread-safe I/O counters and phase timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+        self.touched: Set[str] = set()
+        self.phases: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, path: Optional[Path] = None, **counts: float):
+        """Add to counters; path is recorded as touched"""
+        with self._lock:
+            for name, value in counts.items():
+                self.counters[name] += value
+            if path is not None:
+                self.touched.add(str(path))
+
+    def record_read(self, path: Path, size: int, seconds: float):
+        """A file read from disk and hashed"""
+        self.add(path, files_read=1, bytes_read=size, bytes_hashed=size, hash_seconds=seconds)
+
+    def record_write(self, path: Path, size: int):
+        self.add(path, files_written=1, bytes_written=size)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snap: Dict[str, Any] = dict(self.counters)
+            snap["files_touched"] = len(self.touched)
+        return snap
+
+    def record_phase(self, name: str, wall: float, cpu: float,
+                     before: Dict[str, Any], after: Dict[str, Any]):
+        """Accumulate one run of a phase (repeated phases are summed)"""
+        phase = self.phases.setdefault(name, dict.fromkeys(
+            ("calls", "wall_seconds", "cpu_seconds") + COUNTERS + ("files_touched",), 0))
+        phase["calls"] += 1
+        phase["wall_seconds"] += wall
+        phase["cpu_seconds"] += cpu
+        for key, value in after.items():
+            phase[key] += value - before[key]
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters with derived throughput and hit rate, per phase and in total"""
+        return {
+            "phases": {name: _derive(dict(phase)) for name, phase in self.phases.items()},
+            "total": _derive(self.snapshot()),
+        }
+
+
+def _derive(values: Dict[str, Any]) -> Dict[str, Any]:
+    lookups = values["cache_hits"] + values["cache_misses"]
+    values["cache_hit_rate"] = values["cache_hits"] / lookups if lookups else None
+    # Per hashing stream; parallel streams add up to more than wall time
+    values["hash_mib_per_s"] = (values["bytes_hashed"] / values["hash_seconds"] / 1024 ** 2
+                                if values["hash_seconds"] else None)
+    return values
+
+
+def timed_phase(name: str) -> Callable:
+    """Method decorator: record wall/CPU time and counter deltas in self.stats"""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            before = self.stats.snapshot()
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.stats.record_phase(name, time.perf_counter() - wall,
+                                        time.process_time() - cpu,
+                                        before, self.stats.snapshot())
+        return wrapper
+    return decorator
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class ProfileHooks:
+    """Optional cProfile and tracemalloc around a CLI run"""
+
+    def __init__(self, profile_path: Optional[Path] = None, trace_memory: bool = False,
+                 top: int = 10):
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.top = top
+        self._profiler = None
+
+    def start(self):
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.profile_path is not None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling; return a JSON-serialisable summary"""
+        result: Dict[str, Any] = {}
+        if self._profiler is not None:
+            import io
+            import pstats
+            self._profiler.disable()
+            self._profiler.dump_stats(str(self.profile_path))
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(self.top)
+            result["profile"] = {"path": str(self.profile_path), "top": out.getvalue()}
+            self._profiler = None
+        if self.trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                top = tracemalloc.take_snapshot().statistics("lineno")[:self.top]
+                tracemalloc.stop()
+                result["memory"] = {
+                    "current_bytes": current,
+                    "peak_bytes": peak,
+                    "top": [{"where": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                            for stat in top],
+                }
+        return result
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Byte-preserving patcher for checksum fields of installer.txt / .mnf files
+"""
+
+import re
+import json
+from json.decoder import scanstring
+from typing import Any, Dict, List, Tuple
+
+JSON_DELETE = object()  # patch_json_entries(): remove the member
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+class _Member:
+    """Byte offsets of one `"key": value` member of a JSON object"""
+
+    def __init__(self, key: str, prev_end: int, start: int, value_start: int, value_end: int):
+        self.key = key
+        self.prev_end = prev_end
+        self.start = start
+        self.value_start = value_start
+        self.value_end = value_end
+        self.next_start = -1
+
+
+def _skip_ws(text: str, idx: int) -> int:
+    return _WHITESPACE.match(text, idx).end()
+
+
+def _scan(text: str, idx: int, path: Tuple, prefixes, objects: Dict[Tuple, List[_Member]]) -> int:
+    """Scan the JSON value at idx and return its end offset
+
+    Objects and arrays on the way to a patched entry are walked by hand and
+    their members recorded; every other subtree is skipped with the C
+    decoder.
+    """
+    if path not in prefixes:
+        return _decoder.raw_decode(text, idx)[1]
+
+    if text.startswith('{', idx):
+        members: List[_Member] = []
+        objects[path] = members
+        prev_end = idx + 1
+        idx = _skip_ws(text, idx + 1)
+        if text.startswith('}', idx):
+            return idx + 1
+        while True:
+            if not text.startswith('"', idx):
+                raise ValueError(f"Expected object key at offset {idx}")
+            start = idx
+            key, idx = scanstring(text, idx + 1)
+            idx = _skip_ws(text, idx)
+            if not text.startswith(':', idx):
+                raise ValueError(f"Expected ':' at offset {idx}")
+            value_start = _skip_ws(text, idx + 1)
+            value_end = _scan(text, value_start, path + (key,), prefixes, objects)
+            member = _Member(key, prev_end, start, value_start, value_end)
+            if members:
+                members[-1].next_start = start
+            members.append(member)
+            prev_end = value_end
+            idx = _skip_ws(text, value_end)
+            if text.startswith(',', idx):
+                idx = _skip_ws(text, idx + 1)
+            elif text.startswith('}', idx):
+                return idx + 1
+            else:
+                raise ValueError(f"Expected ',' or '}}' at offset {idx}")
+
+    if text.startswith('[', idx):
+        idx = _skip_ws(text, idx + 1)
+        if text.startswith(']', idx):
+            return idx + 1
+        i = 0
+        while True:
+            idx = _skip_ws(text, _scan(text, idx, path + (i,), prefixes, objects))
+            i += 1
+            if text.startswith(',', idx):
+                idx = _skip_ws(text, idx + 1)
+            elif text.startswith(']', idx):
+                return idx + 1
+            else:
+                raise ValueError(f"Expected ',' or ']' at offset {idx}")
+
+    return _decoder.raw_decode(text, idx)[1]
+
+
+def _line_indent(text: str, idx: int) -> str:
+    """Whitespace between the start of the line and idx"""
+    line_start = text.rfind('\n', 0, idx) + 1
+    indent = text[line_start:idx]
+    return indent if not indent.strip() else ""
+
+
+def _render(value: Any, original: str, indent: str, newline: str) -> str:
+    """JSON for value, laid out like the original value text
+
+    Lists are written one item per line when the original list was, or when
+    it was empty and its member sits on its own (indented) line.
+    """
+    if not isinstance(value, list) or not value:
+        return json.dumps(value, ensure_ascii=False)
+    items = [json.dumps(item, ensure_ascii=False) for item in value]
+    if '\n' not in original and not (indent and original in ("", "[]")):
+        return "[" + ", ".join(items) + "]"
+    # Multi-line list: reuse the original item indentation when there is one
+    match = re.match(r'\[\r?\n([ \t]*)\S', original)
+    item_indent = match.group(1) if match else indent + "    "
+    return ("[" + newline + ("," + newline).join(item_indent + item for item in items)
+            + newline + indent + "]")
+
+
+def patch_json_entries(text: str, updates: Dict[Tuple, Dict[str, Any]], newline: str = "\n") -> str:
+    """Patch fields of JSON objects in text, leaving every other byte untouched
+
+    updates maps an object path such as ("Scripts", 0) to {key: new value};
+    JSON_DELETE as value removes the member. Members whose current value
+    already equals the new one are not rewritten, and missing members are
+    appended after the object's last surviving member (or take the place of
+    the members when all of them are deleted). Raises ValueError if text is
+    not valid JSON or a path does not lead to an object.
+    """
+    prefixes = set()
+    for path in updates:
+        for i in range(len(path) + 1):
+            prefixes.add(tuple(path[:i]))
+    objects: Dict[Tuple, List[_Member]] = {}
+    start = _skip_ws(text, 0)
+    end = _skip_ws(text, _scan(text, start, (), prefixes, objects))
+    if end != len(text):
+        raise ValueError(f"Extra data at offset {end}")
+
+    edits: List[Tuple[int, int, str]] = []
+    for path, fields in updates.items():
+        members = objects.get(tuple(path))
+        if members is None:
+            raise ValueError(f"No JSON object at {list(path)}")
+        by_key = {member.key: member for member in members}
+        added = [(key, value) for key, value in fields.items()
+                 if key not in by_key and value is not JSON_DELETE]
+        survivors = [member for member in members if fields.get(member.key) is not JSON_DELETE]
+        if added and not members:
+            raise ValueError(f"Cannot add {added[0][0]!r} to empty object {list(path)}")
+        if added and not survivors:
+            # Every member is deleted: the new members take their place
+            indent = _line_indent(text, members[0].start)
+            separator = "," + (newline + indent if indent else " ")
+            edits.append((members[0].start, members[-1].value_end, separator.join(
+                f"{json.dumps(key, ensure_ascii=False)}: {_render(value, '', indent, newline)}"
+                for key, value in added)))
+            continue
+        if added:
+            anchor = survivors[-1]
+            indent = _line_indent(text, anchor.start)
+            separator = "," + (newline + indent if indent else " ")
+            for key, value in added:
+                rendered = _render(value, "", indent, newline)
+                edits.append((anchor.value_end, anchor.value_end,
+                              f"{separator}{json.dumps(key, ensure_ascii=False)}: {rendered}"))
+        for key, value in fields.items():
+            member = by_key.get(key)
+            if member is None:
+                continue
+            if value is JSON_DELETE:
+                if member is not members[0]:
+                    edits.append((member.prev_end, member.value_end, ""))
+                elif member.next_start >= 0:
+                    edits.append((member.start, member.next_start, ""))
+                else:
+                    edits.append((member.start, member.value_end, ""))
+                continue
+            original = text[member.value_start:member.value_end]
+            if json.loads(original) == value:
+                continue
+            rendered = _render(value, original, _line_indent(text, member.start), newline)
+            edits.append((member.value_start, member.value_end, rendered))
+
+    if not edits:
+        return text
+    # Insertions go before a deletion that starts at the same offset
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    parts = []
+    pos = 0
+    for edit_start, edit_end, replacement in edits:
+        if edit_start < pos:
+            raise ValueError(f"Overlapping edits at offset {edit_start}")
+        parts.append(text[pos:edit_start])
+        parts.append(replacement)
+        pos = edit_end
+    parts.append(text[pos:])
+    return "".join(parts)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+--watch: keep manifests up to date while files under Data/ and Meta/ change
+
+Changes are picked up with inotify (Linux, via ctypes) or by polling
+mtimes elsewhere. A burst of events is debounced, then only the files the
+manifests actually reference are compared with the last known state; if
+any differ, an incremental update runs (the digest cache skips unchanged
+files and untouched manifests keep their bytes). The builder's own writes
+are recognised the same way and do not trigger another run.
+"""
+
+import os
+import time
+import errno
+import select
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from .constants import DATA_DIR_NAME, META_DIR_NAME, WATCH_DEBOUNCE, WATCH_POLL_INTERVAL
+
+if TYPE_CHECKING:
+    from .builder import ActivatorBuilder
+    from .manifest import ManifestGraph
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT = struct.Struct("iIII")
+
+FileState = Optional[Tuple[int, int, int]]
+
+
+class InotifyWatcher:
+    """Recursive inotify watch of directory trees"""
+
+    def __init__(self, roots: Iterable[Path]):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def _add(self, directory: Path):
+        import ctypes
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            return
+        self._dirs[wd] = directory
+
+    def _add_tree(self, root: Path):
+        if not root.is_dir():
+            return
+        self._add(root)
+        for current, subdirs, _ in os.walk(root):
+            for name in subdirs:
+                self._add(Path(current) / name)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Paths with events, waiting up to timeout seconds (None: forever)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[Path] = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: report the watched roots, callers rescan
+                changed.update(self._dirs.values())
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Fallback: compare mtimes/sizes of all files every interval seconds"""
+
+    def __init__(self, roots: Iterable[Path], interval: float = WATCH_POLL_INTERVAL):
+        self.roots = list(roots)
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int, int]]:
+        state: Dict[Path, Tuple[int, int, int]] = {}
+        for root in self.roots:
+            for current, _, files in os.walk(root):
+                for name in files:
+                    path = Path(current) / name
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    state[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        return state
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+            state = self._scan()
+            changed = {path for path in state.keys() | self._state.keys()
+                       if state.get(path) != self._state.get(path)}
+            self._state = state
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(roots: List[Path], poll: bool = False,
+                 interval: float = WATCH_POLL_INTERVAL):
+    """inotify where available, polling otherwise (or when poll is set)"""
+    if not poll:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots, interval)
+
+
+def file_state(path: Path) -> FileState:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def manifest_targets(graph: "ManifestGraph") -> Set[Path]:
+    """Checksummed files that are manifests themselves (installer.txt), loaded or not"""
+    targets = {ref.target for node in graph.order for ref in node.checksums}
+    return targets - set(graph.payloads)
+
+
+def tracked_files(builder: "ActivatorBuilder") -> Dict[Path, FileState]:
+    """Manifests, installers and payloads of the tree with their current state"""
+    graph = builder.load_graph()
+    paths = set(graph.nodes)
+    paths.update(graph.payloads)
+    for node in graph.order:
+        paths.update(ref.target for ref in node.checksums)
+    return {path: file_state(path) for path in paths}
+
+
+def watch_tree(builder: "ActivatorBuilder", debounce: float = WATCH_DEBOUNCE,
+               poll: bool = False, poll_interval: float = WATCH_POLL_INTERVAL) -> bool:
+    """Update checksums whenever referenced files change, until interrupted"""
+    builder.incremental = True
+    roots = [builder.base_dir / DATA_DIR_NAME, builder.base_dir / META_DIR_NAME]
+    watcher = open_watcher(roots, poll, poll_interval)
+    kind = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {poll_interval}s"
+    try:
+        builder.update_checksums()
+        known = tracked_files(builder)
+        builder.log(f"Watching {', '.join(str(root) for root in roots)} ({kind}), Ctrl+C to stop", "step")
+        while True:
+            events = watcher.wait(None)
+            # Debounce: wait until the burst (editor save, copy) is over
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                events |= more
+
+            changed = [path for path, state in known.items() if file_state(path) != state]
+            new_manifests = [path for path in events
+                             if path.suffix == ".mnf" and path not in known]
+            if not changed and not new_manifests:
+                continue
+
+            for path in changed + new_manifests:
+                builder.log(f"Changed: {os.path.relpath(path, builder.base_dir)}", "info")
+            # Edited manifests/installers, or a graph that failed to load
+            # (a broken installer.txt is no node yet): parse the graph again
+            graph = builder.graph
+            if new_manifests or graph is None or graph.errors \
+                    or any(path in graph.nodes or path in manifest_targets(graph) for path in changed):
+                builder.graph = None
+
+            start = time.perf_counter()
+            if builder.update_checksums():
+                builder.log(f"Manifests up to date ({(time.perf_counter() - start) * 1000:.0f} ms)",
+                            "success")
+            if builder.digest_cache is not None:
+                builder.digest_cache.flush()
+            known = tracked_files(builder)
+    except KeyboardInterrupt:
+        builder.log("Watch stopped", "info")
+        return builder.error_count == 0
+    finally:
+        watcher.close()
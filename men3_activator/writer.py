@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Atomic, fsync-batched manifest writer
+"""
+
+import os
+import stat
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def fsync_path(file_path: Path):
+    """Flush a file's data to disk"""
+    # Writable handle: FlushFileBuffers on Windows rejects read-only ones
+    fd = os.open(str(file_path), os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dirs(dirs: Iterable[Path]):
+    """Persist renames/creations in each directory (no-op where unsupported)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    for directory in dirs:
+        fd = os.open(str(directory), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class ManifestTransaction:
+    """Crash-safe, all-or-nothing write of several manifests
+
+    stage() writes new content to a temp file next to each target. commit()
+    fsyncs all temp files in one batch, renames them over their targets and
+    fsyncs each touched directory once. If anything fails (or the
+    transaction is left without commit) every target is restored.
+    """
+
+    def __init__(self):
+        self._staged: Dict[Path, Tuple[Path, bytes]] = {}
+        self._replaced: List[Tuple[Path, Optional[Path]]] = []
+        self.committed = False
+
+    def __contains__(self, file_path: Path) -> bool:
+        return file_path in self._staged
+
+    def __len__(self) -> int:
+        return len(self._staged)
+
+    def content(self, file_path: Path) -> bytes:
+        """Staged content of file_path"""
+        return self._staged[file_path][1]
+
+    def stage(self, file_path: Path, data: bytes):
+        """Write data to a temp file that will replace file_path on commit"""
+        if file_path in self._staged:
+            os.unlink(self._staged[file_path][0])
+        fd, tmp_name = tempfile.mkstemp(dir=str(file_path.parent),
+                                        prefix=f".{file_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            try:
+                mode = stat.S_IMODE(os.stat(file_path).st_mode)
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_name, mode)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        self._staged[file_path] = (Path(tmp_name), data)
+
+    def commit(self):
+        """Durably replace all staged files, or restore them all on failure"""
+        try:
+            # 1. Flush every staged file before any rename
+            for tmp, _ in self._staged.values():
+                fsync_path(tmp)
+
+            # 2. Rename into place, keeping a link to each old version
+            for file_path, (tmp, _) in self._staged.items():
+                saved: Optional[Path] = None
+                try:
+                    if file_path.exists():
+                        saved = tmp.with_suffix(".orig")
+                        try:
+                            os.link(file_path, saved)
+                        except OSError:
+                            shutil.copy2(file_path, saved)
+                    os.replace(tmp, file_path)
+                except BaseException:
+                    # Not replaced: the original is still in place
+                    if saved is not None and saved.exists():
+                        saved.unlink()
+                    raise
+                self._replaced.append((file_path, saved))
+
+            # 3. Persist the renames
+            self._fsync_dirs({file_path.parent for file_path in self._staged})
+        except BaseException:
+            self.rollback()
+            raise
+
+        for _, saved in self._replaced:
+            if saved is not None:
+                saved.unlink()
+        self._replaced.clear()
+        self.committed = True
+
+    def rollback(self):
+        """Restore replaced files and discard staged temp files"""
+        for file_path, saved in reversed(self._replaced):
+            if saved is not None:
+                os.replace(saved, file_path)
+            else:
+                file_path.unlink()
+        self._replaced.clear()
+        for tmp, _ in self._staged.values():
+            if tmp.exists():
+                tmp.unlink()
+        self._staged.clear()
+
+    @staticmethod
+    def _fsync_dirs(dirs):
+        fsync_dirs(dirs)
+
+    def __enter__(self) -> "ManifestTransaction":
+        return self
+
+    def __exit__(self, *exc):
+        if not self.committed:
+            self.rollback()
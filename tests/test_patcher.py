@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the byte-preserving manifest patcher
+"""
+
+import json
+import unittest
+
+from men3_activator.patcher import JSON_DELETE, patch_json_entries
+
+CRLF_INSTALLER = (
+    '{\r\n'
+    '    "Type": "script",\r\n'
+    '    "Scripts": [\r\n'
+    '        {\r\n'
+    '            "Path": "module/0/activation.sh",\r\n'
+    '            "Length": 10,\r\n'
+    '            "CheckSumSize": 524288,\r\n'
+    '            "CheckSum": [\r\n'
+    '                "aa"\r\n'
+    '            ],\r\n'
+    '            "ExtraFiles": []\r\n'
+    '        }\r\n'
+    '    ]\r\n'
+    '}\r\n'
+)
+
+
+class PatchJsonEntriesTest(unittest.TestCase):
+
+    def patch(self, text, updates, newline="\n"):
+        result = patch_json_entries(text, updates, newline)
+        json.loads(result)
+        return result
+
+    def test_unchanged_values_keep_bytes(self):
+        updates = {("Scripts", 0): {"Length": 10, "CheckSum": ["aa"]}}
+        self.assertEqual(self.patch(CRLF_INSTALLER, updates, "\r\n"), CRLF_INSTALLER)
+
+    def test_replace_keeps_crlf_and_list_layout(self):
+        updates = {("Scripts", 0): {"Length": 20, "CheckSum": ["bb", "cc"]}}
+        result = self.patch(CRLF_INSTALLER, updates, "\r\n")
+        self.assertIn('"Length": 20,\r\n', result)
+        self.assertIn('"CheckSum": [\r\n                "bb",\r\n                "cc"\r\n'
+                      '            ],\r\n', result)
+        self.assertNotIn("\n", result.replace("\r\n", ""))
+
+    def test_delete_last_member(self):
+        updates = {("Scripts", 0): {"ExtraFiles": JSON_DELETE}}
+        result = self.patch(CRLF_INSTALLER, updates, "\r\n")
+        self.assertIn('"CheckSum": [\r\n                "aa"\r\n            ]\r\n        }', result)
+        self.assertNotIn("ExtraFiles", result)
+
+    def test_delete_first_and_middle_member(self):
+        text = '{"A": 1, "B": 2, "C": 3}'
+        self.assertEqual(self.patch(text, {(): {"A": JSON_DELETE}}), '{"B": 2, "C": 3}')
+        self.assertEqual(self.patch(text, {(): {"B": JSON_DELETE}}), '{"A": 1, "C": 3}')
+
+    def test_delete_missing_member_is_noop(self):
+        text = '{"A": 1}'
+        self.assertEqual(self.patch(text, {(): {"B": JSON_DELETE}}), text)
+
+    def test_append_on_indented_object(self):
+        text = '{\r\n    "A": 1\r\n}'
+        result = self.patch(text, {(): {"B": ["x"]}}, "\r\n")
+        self.assertEqual(result, '{\r\n    "A": 1,\r\n    "B": [\r\n        "x"\r\n    ]\r\n}')
+
+    def test_append_on_single_line_object(self):
+        result = self.patch('{"A": 1}', {(): {"B": ["x", "y"]}})
+        self.assertEqual(result, '{"A": 1, "B": ["x", "y"]}')
+
+    def test_append_after_deleted_last_member(self):
+        text = '{"Scripts":[{"Path":"a","ExtraFiles":[]}]}'
+        updates = {("Scripts", 0): {"CheckSum": ["ab"], "ExtraFiles": JSON_DELETE}}
+        self.assertEqual(self.patch(text, updates), '{"Scripts":[{"Path":"a", "CheckSum": ["ab"]}]}')
+
+    def test_append_when_every_member_is_deleted(self):
+        text = '{"Scripts":[{"ExtraFiles":[]}]}'
+        updates = {("Scripts", 0): {"CheckSum": ["ab"], "ExtraFiles": JSON_DELETE}}
+        self.assertEqual(self.patch(text, updates), '{"Scripts":[{"CheckSum": ["ab"]}]}')
+
+    def test_append_when_every_indented_member_is_deleted(self):
+        text = '{\r\n    "A": 1,\r\n    "B": 2\r\n}'
+        updates = {(): {"A": JSON_DELETE, "B": JSON_DELETE, "C": 3, "D": 4}}
+        self.assertEqual(self.patch(text, updates, "\r\n"), '{\r\n    "C": 3,\r\n    "D": 4\r\n}')
+
+    def test_append_to_empty_object_raises(self):
+        with self.assertRaises(ValueError):
+            patch_json_entries('{"Scripts":[{}]}', {("Scripts", 0): {"CheckSum": []}})
+
+    def test_invalid_input_raises(self):
+        with self.assertRaises(ValueError):
+            patch_json_entries('{"A": 1', {(): {"A": 2}})
+        with self.assertRaises(ValueError):
+            patch_json_entries('{"A": 1} x', {(): {"A": 2}})
+        with self.assertRaises(ValueError):
+            patch_json_entries('{"A": 1}', {("Scripts", 0): {"A": 2}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the atomic manifest transaction
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from men3_activator.writer import ManifestTransaction
+
+
+class ManifestTransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.a = self.dir / "a.mnf"
+        self.b = self.dir / "b.mnf"
+        self.a.write_bytes(b"old a\r\n")
+        self.b.write_bytes(b"old b\r\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def assertOnlyTargets(self, *names):
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted(names))
+
+    def test_commit_replaces_all(self):
+        with ManifestTransaction() as txn:
+            txn.stage(self.a, b"new a\r\n")
+            txn.stage(self.b, b"new b\r\n")
+            txn.commit()
+        self.assertEqual(self.a.read_bytes(), b"new a\r\n")
+        self.assertEqual(self.b.read_bytes(), b"new b\r\n")
+        self.assertOnlyTargets("a.mnf", "b.mnf")
+
+    def test_commit_creates_new_file(self):
+        c = self.dir / "c.mnf"
+        with ManifestTransaction() as txn:
+            txn.stage(c, b"new c")
+            txn.commit()
+        self.assertEqual(c.read_bytes(), b"new c")
+        self.assertOnlyTargets("a.mnf", "b.mnf", "c.mnf")
+
+    def test_restage_replaces_temp_file(self):
+        with ManifestTransaction() as txn:
+            txn.stage(self.a, b"first")
+            txn.stage(self.a, b"second")
+            self.assertEqual(txn.content(self.a), b"second")
+            txn.commit()
+        self.assertEqual(self.a.read_bytes(), b"second")
+        self.assertOnlyTargets("a.mnf", "b.mnf")
+
+    def test_leaving_without_commit_discards(self):
+        with ManifestTransaction() as txn:
+            txn.stage(self.a, b"new a")
+        self.assertEqual(self.a.read_bytes(), b"old a\r\n")
+        self.assertOnlyTargets("a.mnf", "b.mnf")
+
+    def test_failed_rename_rolls_back_everything(self):
+        real_replace = os.replace
+        calls = []
+
+        def replace(src, dst):
+            calls.append(dst)
+            # Second target fails after the first one was replaced
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return real_replace(src, dst)
+
+        txn = ManifestTransaction()
+        txn.stage(self.a, b"new a")
+        txn.stage(self.b, b"new b")
+        with mock.patch("men3_activator.writer.os.replace", side_effect=replace):
+            with self.assertRaises(OSError):
+                txn.commit()
+        self.assertEqual(self.a.read_bytes(), b"old a\r\n")
+        self.assertEqual(self.b.read_bytes(), b"old b\r\n")
+        self.assertOnlyTargets("a.mnf", "b.mnf")
+
+    def test_failed_fsync_rolls_back(self):
+        txn = ManifestTransaction()
+        txn.stage(self.a, b"new a")
+        with mock.patch("men3_activator.writer.os.fsync", side_effect=OSError("I/O error")):
+            with self.assertRaises(OSError):
+                txn.commit()
+        self.assertEqual(self.a.read_bytes(), b"old a\r\n")
+        self.assertOnlyTargets("a.mnf", "b.mnf")
+
+
+if __name__ == '__main__':
+    unittest.main()